@@ -1,41 +1,171 @@
+import os
+import time
+import argparse
+import importlib.util
+
 import pandas as pd
 
-# Load original file
-input_path = "Data/Annotation_Book_0/Story_0.xlsx"
-output_path = "Data/Annotation_Book_0/Story_0_with_IDs.xlsx"
-
-df = pd.read_excel(input_path)
-df = df.dropna(subset=["Index"]).reset_index(drop=True)
-
-# Forward fill macro-level event
-df["Plot_0"] = df["Plot_0"].fillna(method="ffill")
-df["Plot_1"] = df["Plot_1"].fillna(method="ffill")
-df["Plot_2"] = df["Plot_2"].fillna(method="ffill")
-
-# === Assign unique IDs for Plot_1 (sub-events) ===
-plot1_ids = []
-prev = None
-counter = {}
-for i, row in df.iterrows():
-    curr = row["Plot_1"]
-    if curr != prev:
-        counter[curr] = counter.get(curr, 0) + 1
-    plot1_ids.append(f"{curr}_{counter[curr]}")
-    prev = curr
-df["Plot_1_ID"] = plot1_ids
-
-# === Assign unique IDs for Plot_2 (event segments) ===
-plot2_ids = []
-prev = None
-counter2 = {}
-for i, row in df.iterrows():
-    curr = row["Plot_2"]
-    if curr != prev:
-        counter2[curr] = counter2.get(curr, 0) + 1
-    plot2_ids.append(f"seg{len(counter2):03d}")
-    prev = curr
-df["Plot_2_ID"] = plot2_ids
-
-# Save to new Excel file
-df.to_excel(output_path, index=False)
-print(f"✅ Updated Excel saved to {output_path}")
+from IDRegistry import IDRegistry, registry_path
+
+# === CONFIG ===
+BOOK = "0"
+INPUT_FILE = "Data/Annotation_Book_{book}/Story_{book}.xlsx"
+OUTPUT_FILE = "Data/Annotation_Book_{book}/Story_{book}_with_IDs.xlsx"
+FILL_COLUMNS = ["Plot_0", "Plot_1", "Plot_2"]  # annotators only mark where a plot level changes
+FORMATS = {"excel": ".xlsx", "parquet": ".parquet"}
+PARQUET_ENGINES = ["pyarrow", "fastparquet"]  # pandas needs one of them for parquet (optional dependency)
+PARQUET_HINT = "--format parquet needs pyarrow or fastparquet (pip install pyarrow)"
+
+# === Run-length IDs (vectorized) ===
+def run_starts(values):
+    """
+    True where a new run of equal values begins; consecutive NaN rows (the
+    unlabelled rows before the first label) are one run, not one per row.
+    """
+    previous = values.shift()
+    starts = values.ne(previous) & ~(values.isna() & previous.isna())
+    starts.iloc[:1] = True  # the first row always starts a run
+    return starts
+
+def event_ids(plot1):
+    """
+    Plot_1_ID: "{label}_{n}" for the n-th run of that label ("Intro_1", ..., "Intro_2").
+    """
+    occurrence = run_starts(plot1).groupby(plot1, dropna=False, sort=False).cumsum()
+    return plot1.astype(str).fillna("nan") + "_" + occurrence.astype(str)  # unlabelled leading rows: all "nan_1"
+
+def segment_ids(plot2):
+    """
+    Plot_2_ID: "segNNN" numbered by the distinct Plot_2 labels seen so far.
+    """
+    count = (~plot2.duplicated()).cumsum()
+    return "seg" + count.astype(str).str.zfill(3)
+
+def assign_ids(df):
+    """
+    Rows with an Index, plot levels forward-filled, Plot_1_ID and Plot_2_ID added.
+    """
+    df = df.dropna(subset=["Index"]).reset_index(drop=True)
+    df[FILL_COLUMNS] = df[FILL_COLUMNS].ffill()
+    df["Plot_1_ID"] = event_ids(df["Plot_1"])
+    df["Plot_2_ID"] = segment_ids(df["Plot_2"])
+    return df
+
+def loop_ids(df):
+    """
+    (Plot_1_ID, Plot_2_ID) lists from the original row-by-row loops, for
+    --check; NaN labels compare equal, as in run_starts.
+    """
+    event, segment = [], []
+    prev1 = prev2 = None
+    events, segments = {}, {}
+    for i, (curr1, curr2) in enumerate(zip(df["Plot_1"].fillna("nan"), df["Plot_2"].fillna("nan"))):
+        if i == 0 or curr1 != prev1:
+            events[curr1] = events.get(curr1, 0) + 1
+        if i == 0 or curr2 != prev2:
+            segments[curr2] = segments.get(curr2, 0) + 1
+        event.append(f"{curr1}_{events[curr1]}")
+        segment.append(f"seg{len(segments):03d}")
+        prev1, prev2 = curr1, curr2
+    return event, segment
+
+# === Files ===
+def parquet_available():
+    return any(importlib.util.find_spec(engine) for engine in PARQUET_ENGINES)
+
+def read_annotation_table(path, sheet_name=0):
+    """
+    Annotation sheet(s) from Excel or parquet (by extension). sheet_name=None
+    returns {sheet: DataFrame} for every sheet of a workbook.
+    """
+    if path.endswith(FORMATS["parquet"]):
+        if not parquet_available():
+            raise ImportError(f"cannot read {path}: {PARQUET_HINT}")
+        df = pd.read_parquet(path)
+        return {os.path.splitext(os.path.basename(path))[0]: df} if sheet_name is None else df
+    return pd.read_excel(path, sheet_name=sheet_name)
+
+def table_path(path, fmt="excel", sheet=None):
+    """
+    File holding a sheet of the output at path: "{stem}.xlsx" (every sheet),
+    "{stem}.parquet", or "{stem}_{sheet}.parquet" for --all-sheets output.
+    """
+    stem = os.path.splitext(path)[0]
+    if fmt == "parquet" and sheet is not None:
+        return f"{stem}_{sheet}{FORMATS['parquet']}"
+    return stem + FORMATS[fmt]
+
+def write_annotation_tables(sheets, path, fmt="excel", per_sheet=False):
+    """
+    Excel: one workbook with the same sheets. Parquet: one file, or with
+    per_sheet one file per sheet (see table_path). Returns the written paths.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt == "excel":
+        out = table_path(path, fmt)
+        with pd.ExcelWriter(out) as writer:
+            for sheet, df in sheets.items():
+                df.to_excel(writer, sheet_name=str(sheet), index=False)
+        return [out]
+    if not parquet_available():
+        raise ImportError(f"cannot write {table_path(path, fmt)}: {PARQUET_HINT}")
+    paths = []
+    for sheet, df in sheets.items():
+        out = table_path(path, fmt, sheet if per_sheet else None)
+        df.to_parquet(out, index=False)
+        paths.append(out)
+    return paths
+
+def process_file(input_path, output_path, all_sheets=False, fmt="excel", registry=True, check=False):
+    """
+    With registry, IDs already issued for this output (IDRegistry.py) are kept
+    for every unchanged or edited span. With check, the run-length IDs are
+    compared to loop_ids first. Returns (written paths, {sheet: ID diff}).
+    """
+    sheets = read_annotation_table(input_path, sheet_name=None if all_sheets else 0)
+    if not all_sheets:
+        sheets = {"Sheet1": sheets}
+    sheets = {sheet: assign_ids(df) for sheet, df in sheets.items()}
+    for sheet, df in sheets.items() if check else ():
+        if (df["Plot_1_ID"].tolist(), df["Plot_2_ID"].tolist()) != loop_ids(df):
+            raise ValueError(f"{input_path} [{sheet}]: run-length IDs differ from the row-by-row assignment")
+    diffs = {}
+    if registry:
+        ids = IDRegistry.load(registry_path(output_path))
+        for sheet, df in sheets.items():
+            sheets[sheet], diffs[sheet] = ids.stabilize(df, str(sheet))
+        ids.save(registry_path(output_path))
+    return write_annotation_tables(sheets, output_path, fmt, per_sheet=all_sheets), diffs
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assign Plot_1_ID / Plot_2_ID to annotation sheets.")
+    parser.add_argument("--books", nargs="+", default=[BOOK],
+                        help=f"books to process ({INPUT_FILE} -> {OUTPUT_FILE})")
+    parser.add_argument("--input", nargs="+", default=None,
+                        help="explicit annotation files instead of --books (output: <stem>_with_IDs)")
+    parser.add_argument("--all-sheets", action="store_true", help="process every sheet of each workbook")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="excel")
+    parser.add_argument("--no-registry", action="store_true",
+                        help="plain run-length IDs; ignore and keep the ID registry untouched")
+    parser.add_argument("--check", action="store_true",
+                        help="verify the vectorized IDs against the row-by-row loop before writing")
+    args = parser.parse_args()
+    if args.format == "parquet" and not parquet_available():
+        parser.error(PARQUET_HINT)  # before any ID registry is updated
+
+    if args.input:
+        jobs = [(path, os.path.splitext(path)[0] + "_with_IDs" + FORMATS["excel"]) for path in args.input]
+    else:
+        jobs = [(INPUT_FILE.format(book=book), OUTPUT_FILE.format(book=book)) for book in args.books]
+
+    for input_path, output_path in jobs:
+        start = time.perf_counter()
+        written, diffs = process_file(input_path, output_path, args.all_sheets, args.format,
+                                      not args.no_registry, args.check)
+        for path in written:
+            print(f"✅ Updated annotations saved to {path} ({time.perf_counter() - start:.2f}s)")
+        for sheet, diff in diffs.items():
+            for level, d in diff.items():
+                print(f"   {sheet} {level}: {d['kept']} kept, {len(d['changed'])} changed, "
+                      f"{len(d['new'])} new, {len(d['removed'])} removed")
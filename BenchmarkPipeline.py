@@ -0,0 +1,137 @@
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+from pathlib import Path
+from contextlib import redirect_stdout
+
+from SyntheticCorpus import make_book
+from GeneratePanelKGs_updated import build_panel_graph
+from BuildEventKG_withID_Temporal import build_event_kg
+from BuildSequenceKG_updated import build_sequence_kg
+from IntegrateKnowledgeGraphs import integrate_graphs
+from ReasoningQueries_updated_2 import (
+    get_actions_by_macro_event,
+    get_dialogues_by_event,
+    get_character_appearances,
+    get_panels_by_macro_event,
+)
+
+# === CONFIG ===
+SIZES = [100, 500, 2000]          # panels per synthetic book
+REPEATS = 3
+THRESHOLD = 0.25                  # allowed slowdown / memory growth vs. baseline
+NOISE_FLOOR_S = 0.005             # ignore timing regressions smaller than this
+RESULTS_PATH = "benchmarks/pipeline_results.json"
+
+# === Stages ===
+def stage_fns(df, pages):
+    """
+    Returns [(stage, fn)] in pipeline order; later stages reuse earlier outputs.
+    """
+    state = {}
+    meta = df.set_index("Index")
+    panels = {f"{stem}_{i}": panel for stem, page in pages.items() for i, panel in enumerate(page["panels"])}
+
+    def panel_graphs():
+        state["panel_graphs"] = {pid: build_panel_graph(panel, pid, meta.loc[pid].to_dict())
+                                 for pid, panel in panels.items()}
+
+    def event_kg():
+        state["G_event"] = build_event_kg(df)
+
+    def sequence_kg():
+        state["G_seq"], _ = build_sequence_kg(df)
+
+    def integrate():
+        state["G"] = integrate_graphs(state["panel_graphs"], state["G_seq"], state["G_event"])
+
+    def task(n):
+        def run():
+            G = state["G"]
+            macros = [m for m, d in G.nodes(data=True) if d.get("type") == "macro_event"]
+            events = [e for e, d in G.nodes(data=True) if d.get("type") == "event"]
+            with redirect_stdout(io.StringIO()):
+                if n == 1:
+                    [get_actions_by_macro_event(G, m) for m in macros]
+                elif n == 2:
+                    [get_dialogues_by_event(G, e) for e in events]
+                elif n == 3:
+                    get_character_appearances(G)
+                else:
+                    [get_panels_by_macro_event(G, m) for m in macros]
+        return run
+
+    return [("build_panel_graph", panel_graphs), ("event_kg", event_kg),
+            ("sequence_kg", sequence_kg), ("integrate", integrate),
+            ("task1", task(1)), ("task2", task(2)), ("task3", task(3)), ("task4", task(4))]
+
+def measure(size, repeats, seed=0):
+    df, pages = make_book(size, seed)
+    results = {}
+    stages = stage_fns(df, pages)
+    for stage, fn in stages:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[f"{stage}@{size}"] = {"seconds": min(timings), "peak_mb": peak / 1e6}
+        print(f"{stage:<18} n={size:<7} {min(timings):9.4f}s  peak {peak / 1e6:8.2f} MB")
+    return results
+
+# === Regression check ===
+def compare(current, baseline, threshold=THRESHOLD):
+    regressions = []
+    for key, cur in current.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if cur["seconds"] > base["seconds"] * (1 + threshold) \
+                and cur["seconds"] - base["seconds"] > NOISE_FLOOR_S:
+            regressions.append(f"{key}: {base['seconds']:.4f}s -> {cur['seconds']:.4f}s")
+        if cur["peak_mb"] > base["peak_mb"] * (1 + threshold) and cur["peak_mb"] - base["peak_mb"] > 1:
+            regressions.append(f"{key}: {base['peak_mb']:.2f} MB -> {cur['peak_mb']:.2f} MB")
+    return regressions
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory benchmark of the KG pipeline stages.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="panels per synthetic book")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--seed", type=int, default=0, help="synthetic corpus seed")
+    parser.add_argument("--out", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        results.update(measure(size, args.repeats, args.seed))
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+                     "sizes": args.sizes, "repeats": args.repeats, "seed": args.seed},
+            "results": results,
+        }, f, indent=2)
+    print(f"✅ Benchmark results saved to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for r in regressions:
+                print("  " + r)
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} vs {args.baseline}")
@@ -0,0 +1,80 @@
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from ReasoningQueries_updated_2 import (
+    load_kg,
+    get_actions_by_macro_event,
+    get_dialogues_by_event,
+    get_character_appearances,
+    get_panels_by_macro_event,
+    get_successors_by_relation,
+)
+from SparseReasoning import (
+    build_sparse_kg,
+    sparse_actions_by_macro_event,
+    sparse_dialogues_by_event,
+    sparse_characters_by_event,
+    sparse_panels_by_macro_event,
+)
+
+# === CONFIG ===
+KG_PATH = "Data/KGs_Book_0/integrated_kg.json"
+REPEATS = 3
+
+# === Per-target backend (one call per macro-event / event) ===
+def per_target_characters_by_event(G):
+    event_to_characters = {}
+    for char, panels in get_character_appearances(G).items():
+        for panel in panels:
+            for seg in get_successors_by_relation(G, panel, "instantiates", "event_segment"):
+                for event in get_successors_by_relation(G, seg, "subevent_of", "event"):
+                    event_to_characters.setdefault(event, set()).add(char)
+    return {e: sorted(chars) for e, chars in event_to_characters.items()}
+
+def run_per_target(G):
+    macros = [n for n, d in G.nodes(data=True) if d.get("type") == "macro_event"]
+    events = [n for n, d in G.nodes(data=True) if d.get("type") == "event"]
+    with redirect_stdout(io.StringIO()):  # silence [DEBUG] prints
+        return {
+            "task1": {m: get_actions_by_macro_event(G, m) for m in macros},
+            "task2": {e: get_dialogues_by_event(G, e) for e in events},
+            "task3": per_target_characters_by_event(G),
+            "task4": {m: get_panels_by_macro_event(G, m) for m in macros},
+        }
+
+def run_sparse(G):
+    SK = build_sparse_kg(G)
+    return {
+        "task1": sparse_actions_by_macro_event(SK),
+        "task2": sparse_dialogues_by_event(SK),
+        "task3": {e: c for e, c in sparse_characters_by_event(SK).items() if c},
+        "task4": sparse_panels_by_macro_event(SK),
+    }
+
+def best_of(fn, G, repeats):
+    timings, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(G)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+# === MAIN ===
+if __name__ == "__main__":
+    kg_path = sys.argv[1] if len(sys.argv) > 1 else KG_PATH
+    G = load_kg(kg_path)
+    print(f"KG: {kg_path} ({G.number_of_nodes()} nodes, {G.number_of_edges()} edges)")
+
+    t_loop, res_loop = best_of(run_per_target, G, REPEATS)
+    t_sparse, res_sparse = best_of(run_sparse, G, REPEATS)
+
+    for task in ("task1", "task2", "task3", "task4"):
+        same = res_loop[task] == res_sparse[task]
+        print(f"{task}: outputs {'match' if same else 'DIFFER'}")
+
+    print(f"\nPer-target backend : {t_loop:.4f}s")
+    print(f"Sparse backend     : {t_sparse:.4f}s (includes matrix build)")
+    if t_sparse > 0:
+        print(f"Speed-up           : {t_loop / t_sparse:.1f}x")
@@ -0,0 +1,93 @@
+import numpy as np
+
+# === CONFIG ===
+N_RESAMPLES = 2000
+ALPHA = 0.05
+SEED = 0
+CI_METRICS = ["Precision", "Recall", "F1"]
+MAX_CELLS = 4_000_000  # resamples x rows held in memory at once
+
+# === Resampling ===
+def _resample_weights(rng, n_rows, n_resamples):
+    """
+    Yield (chunk, n_rows) matrices of bootstrap counts: row i of a chunk says
+    how often each original row was drawn, so resampled sums are one matmul.
+    """
+    chunk = max(1, MAX_CELLS // max(n_rows, 1))
+    done = 0
+    while done < n_resamples:
+        size = min(chunk, n_resamples - done)
+        # Draw row indices and count them per resample (much faster than rng.multinomial)
+        draws = rng.integers(0, n_rows, size=(size, n_rows)) + np.arange(size)[:, None] * n_rows
+        yield np.bincount(draws.ravel(), minlength=size * n_rows).reshape(size, n_rows).astype(float)
+        done += size
+
+def _micro(tp, n_gt, n_pred):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = np.where(n_pred > 0, tp / n_pred, 0.0)
+        r = np.where(n_gt > 0, tp / n_gt, 0.0)
+        f1 = np.where(p + r > 0, 2 * p * r / (p + r), 0.0)
+    return {"Precision": p, "Recall": r, "F1": f1}
+
+def bootstrap_distributions(scores, metrics=CI_METRICS, n_resamples=N_RESAMPLES, seed=SEED):
+    """
+    Bootstrap distributions of the macro (mean of rows) and micro (pooled
+    TP / N_GT / N_PRED) metrics over resampled rows of a score table
+    (PartialMatchEval.score_items). Returns {"Macro_F1": array, ...}.
+    """
+    n = len(scores)
+    rng = np.random.default_rng(seed)
+    values = scores[list(metrics)].to_numpy(dtype=float)
+    counts = scores[["TP", "N_GT", "N_PRED"]].to_numpy(dtype=float)
+    macro, micro = [], []
+    for weights in _resample_weights(rng, n, n_resamples):
+        macro.append(weights @ values / n)
+        micro.append(weights @ counts)
+    macro, micro = np.vstack(macro), np.vstack(micro)
+    pooled = _micro(micro[:, 0], micro[:, 1], micro[:, 2])
+
+    out = {f"Macro_{m}": macro[:, j] for j, m in enumerate(metrics)}
+    out.update({f"Micro_{m}": pooled[m] for m in metrics if m in pooled})
+    return out
+
+def bootstrap_ci(scores, metrics=CI_METRICS, n_resamples=N_RESAMPLES, alpha=ALPHA, seed=SEED):
+    """
+    Percentile confidence intervals: {"Macro_F1_CI_Low": ..., "Macro_F1_CI_High": ..., ...}.
+    """
+    if len(scores) == 0:
+        return {}
+    out = {}
+    for name, dist in bootstrap_distributions(scores, metrics, n_resamples, seed).items():
+        low, high = np.quantile(dist, [alpha / 2, 1 - alpha / 2])
+        out[f"{name}_CI_Low"] = float(low)
+        out[f"{name}_CI_High"] = float(high)
+    return out
+
+# === Paired comparison (e.g. raw vs normalized KG) ===
+def paired_test(scores_a, scores_b, metrics=CI_METRICS, n_resamples=N_RESAMPLES, alpha=ALPHA, seed=SEED):
+    """
+    Paired bootstrap over the ids scored in both tables. Diff = mean(b - a)
+    per metric, with a percentile CI and a two-sided p-value (share of
+    resampled diffs, re-centred on zero, at least as extreme as the observed one).
+    """
+    both = scores_a[["ID"] + list(metrics)].merge(scores_b[["ID"] + list(metrics)], on="ID",
+                                                  suffixes=("_a", "_b"))
+    n = len(both)
+    if n == 0:
+        return {"Paired_Rows": 0}
+    diffs = np.column_stack([both[f"{m}_b"].to_numpy(float) - both[f"{m}_a"].to_numpy(float) for m in metrics])
+    observed = diffs.mean(axis=0)
+
+    rng = np.random.default_rng(seed)
+    boot = np.vstack([weights @ diffs / n for weights in _resample_weights(rng, n, n_resamples)])
+    low, high = np.quantile(boot, [alpha / 2, 1 - alpha / 2], axis=0)
+    extreme = np.abs(boot - observed) >= np.abs(observed) - 1e-12
+    p_values = (extreme.sum(axis=0) + 1) / (n_resamples + 1)
+
+    out = {"Paired_Rows": n}
+    for j, m in enumerate(metrics):
+        out[f"Paired_{m}_Diff"] = float(observed[j])
+        out[f"Paired_{m}_CI_Low"] = float(low[j])
+        out[f"Paired_{m}_CI_High"] = float(high[j])
+        out[f"Paired_{m}_P"] = float(p_values[j]) if np.any(diffs[:, j]) else 1.0
+    return out
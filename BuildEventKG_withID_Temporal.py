@@ -4,6 +4,9 @@ import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
 from networkx.readwrite import json_graph
+from LayeredLayout import layered_layout, figure_size
+from TemporalConstraints import STORY_ORDER, story_constraints, attach_story_edges, load_overrides
+from IntervalIndex import attach_interval_index, build_interval_index_from_frame
 
 # === CONFIG ===
 # EXCEL_FILE = "Story_0_sub_with_IDs.xlsx"
@@ -12,123 +15,131 @@ from networkx.readwrite import json_graph
 EXCEL_FILE = "Story_0_with_IDs.xlsx"
 DATA_DIR = "Data/Annotation_Book_0/"
 OUTPUT_DIR = "./output/event_kg_full"
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# === LAYOUT ===
-def layered_layout(G):
-    layers = {"macro_event": 0, "event": 1, "event_segment": 2, "panel": 3}
-    spacing = 5
-    pos = {}
-    layer_counts = {k: 0 for k in layers}
-    for n, d in G.nodes(data=True):
-        layer = layers.get(d["type"], 4)
-        x = layer_counts[d["type"]] * spacing
-        y = -layer * 4  # top-down
-        pos[n] = (x, y)
-        layer_counts[d["type"]] += 1
-    return pos
-
-# === LOAD & PREPARE ===
-df = pd.read_excel(os.path.join(DATA_DIR, EXCEL_FILE))
-df = df.dropna(subset=["Index"]).reset_index(drop=True)
-
-G = nx.DiGraph()
-
-# === ADD STRUCTURE ===
-for _, row in df.iterrows():
-    panel_id = str(row["Index"])
-    plot_0 = str(row["Plot_0"])
-    plot_1 = str(row["Plot_1"])
-    plot_2 = str(row["Plot_2"])
-    plot_1_id = str(row["Plot_1_ID"])
-    plot_2_id = str(row["Plot_2_ID"])
-
-    G.add_node(plot_0, type="macro_event", label=plot_0)
-    G.add_node(plot_1_id, type="event", label=plot_1)
-    G.add_node(plot_2_id, type="event_segment", label=plot_2)
-    G.add_node(panel_id, type="panel", label=panel_id)
-
-    G.add_edge(plot_1_id, plot_0, relation="subevent_of")
-    G.add_edge(plot_2_id, plot_1_id, relation="subevent_of")
-    G.add_edge(panel_id, plot_2_id, relation="instantiates")
-
-# === ADD TEMPORAL: READING ORDER ===
-
-## A. Between panels
-panel_ids = df["Index"].astype(str).tolist()
-for i in range(len(panel_ids) - 1):
-    G.add_edge(panel_ids[i], panel_ids[i+1], relation="precedes_reading")
-
-## B. Between segments
-first_segment_ids = df.drop_duplicates("Plot_2_ID")["Plot_2_ID"].tolist()
-for i in range(len(first_segment_ids) - 1):
-    src, tgt = first_segment_ids[i], first_segment_ids[i+1]
-    if src != tgt and src in G.nodes and tgt in G.nodes:
-        G.add_edge(src, tgt, relation="precedes_reading")
-
-## C. Between events
-first_event_ids = df.drop_duplicates("Plot_1_ID")["Plot_1_ID"].tolist()
-for i in range(len(first_event_ids) - 1):
-    src, tgt = first_event_ids[i], first_event_ids[i+1]
-    if src != tgt and src in G.nodes and tgt in G.nodes:
-        G.add_edge(src, tgt, relation="precedes_reading")
-
-# === ADD MANUAL STORYTIME TEMPORAL EDGES (override)
-story_order = [
-    ("Intro_1", "Get new rice_cooker_1"),
-    ("Think of family_1", "Message from family_1")
+STORY_ORDER_FILE = os.path.join(DATA_DIR, "story_order.csv")  # optional Before,After overrides
+MAX_ROW_NODES = 60  # wrap the layout into rows of at most this many panels
+
+# === BUILD ===
+LEVELS = [  # (id column, label column, node type), top-down
+    ("Plot_0", "Plot_0", "macro_event"),
+    ("Plot_1_ID", "Plot_1", "event"),
+    ("Plot_2_ID", "Plot_2", "event_segment"),
+    ("Index", "Index", "panel"),
 ]
-for src, tgt in story_order:
-    if src in G.nodes and tgt in G.nodes:
-        G.add_edge(src, tgt, relation="precedes_storytime")
-
-# === EXPORT JSON ===
-with open(os.path.join(OUTPUT_DIR, "event_kg.json"), "w", encoding="utf-8") as f:
-    json.dump(json_graph.node_link_data(G), f, indent=2, ensure_ascii=False)
-
-# === VISUALIZE ===
-pos = layered_layout(G)
-node_labels = {n: d["label"] for n, d in G.nodes(data=True)}
-
-node_colors = []
-for _, d in G.nodes(data=True):
-    if d["type"] == "macro_event":
-        node_colors.append("gold")
-    elif d["type"] == "event":
-        node_colors.append("orange")
-    elif d["type"] == "event_segment":
-        node_colors.append("lightgreen")
-    elif d["type"] == "panel":
-        node_colors.append("skyblue")
-    else:
-        node_colors.append("gray")
-
-plt.figure(figsize=(30, 18))
-nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=1200, edgecolors="black")
-nx.draw_networkx_labels(G, pos, labels=node_labels, font_size=9)
-
-edge_labels = nx.get_edge_attributes(G, "relation")
-edge_styles = {
-    "subevent_of": {"color": "black", "style": "solid"},
-    "instantiates": {"color": "gray", "style": "dashed"},
-    "precedes_storytime": {"color": "red", "style": "solid"},
-    "precedes_reading": {"color": "blue", "style": "dashed"},
-}
-
-for rel_type, style in edge_styles.items():
-    edges = [(u, v) for u, v, d in G.edges(data=True) if d["relation"] == rel_type]
-    nx.draw_networkx_edges(G, pos, edgelist=edges, edge_color=style["color"],
-                           arrows=True, arrowstyle="-|>", arrowsize=25,
-                           connectionstyle='arc3,rad=0.2', width=1, style=style["style"])
-    nx.draw_networkx_edge_labels(G, pos,
-        edge_labels={k: v for k, v in edge_labels.items() if k in edges},
-        font_color=style["color"], label_pos=0.6)#, font_size=18)
-
-plt.title("Hierarchical Event KG with Reading & Narrative Time", fontsize=14)
-plt.axis("off")
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "event_kg_full.png"), dpi=300)
-plt.close()
-
-print("✅ Saved: JSON + PNG with full temporal structure.")
\ No newline at end of file
+
+def _chain_edges(ids, relation):
+    return [(u, v, {"relation": relation}) for u, v in zip(ids[:-1], ids[1:])]
+
+def build_event_kg(df, story_order=STORY_ORDER):
+    """
+    Event hierarchy (macro_event <- event <- event_segment <- panel) with
+    reading-order and storytime edges, built in memory from an annotation
+    frame with Plot_1_ID / Plot_2_ID (see AssignEventIDs.py). Story time is
+    the story_order overrides plus the Narrative_Time order, checked for
+    cycles and transitively reduced (see TemporalConstraints.py). Every
+    segment, event and macro-event carries its reading-rank interval, and
+    the interval index is stored in G.graph (see IntervalIndex.py).
+
+    Rows are turned into unique node and edge tuples with pandas and added in
+    bulk; the result is the same graph (node order, attributes) as adding
+    every row's nodes and edges one by one.
+    """
+    engine = story_constraints(df, story_order)
+    cols = list(dict.fromkeys(c for level in LEVELS for c in level[:2]))
+    df = df.dropna(subset=["Index"])[cols].astype(str).reset_index(drop=True)
+
+    G = nx.DiGraph()
+
+    # === ADD STRUCTURE ===
+    # One (id, type, label) per row and level, in row-major order; a node keeps
+    # its first position and its last attributes, as repeated add_node does
+    nodes = pd.concat(
+        [pd.DataFrame({"id": df[id_col], "type": node_type, "label": df[label_col],
+                       "order": df.index * len(LEVELS) + depth})
+         for depth, (id_col, label_col, node_type) in enumerate(LEVELS)]
+    ).sort_values("order", kind="stable")
+    nodes = nodes.groupby("id", sort=False)[["type", "label"]].last()
+    G.add_nodes_from((n, {"type": t, "label": l})
+                     for n, t, l in zip(nodes.index, nodes["type"], nodes["label"]))
+
+    structure = pd.concat(
+        [pd.DataFrame({"src": df["Plot_1_ID"], "tgt": df["Plot_0"], "relation": "subevent_of",
+                       "order": df.index * 3}),
+         pd.DataFrame({"src": df["Plot_2_ID"], "tgt": df["Plot_1_ID"], "relation": "subevent_of",
+                       "order": df.index * 3 + 1}),
+         pd.DataFrame({"src": df["Index"], "tgt": df["Plot_2_ID"], "relation": "instantiates",
+                       "order": df.index * 3 + 2})]
+    ).sort_values("order", kind="stable").drop_duplicates(["src", "tgt", "relation"])
+    G.add_edges_from((u, v, {"relation": r})
+                     for u, v, r in zip(structure["src"], structure["tgt"], structure["relation"]))
+
+    # === ADD TEMPORAL: READING ORDER ===
+    # A. Between panels, B. between segments, C. between events (first appearance)
+    G.add_edges_from(_chain_edges(df["Index"].tolist(), "precedes_reading"))
+    G.add_edges_from(_chain_edges(df["Plot_2_ID"].unique().tolist(), "precedes_reading"))
+    G.add_edges_from(_chain_edges(df["Plot_1_ID"].unique().tolist(), "precedes_reading"))
+
+    # === ADD READING-RANK INTERVALS
+    attach_interval_index(G, build_interval_index_from_frame(df))
+
+    # === ADD STORYTIME TEMPORAL EDGES (overrides + Narrative_Time)
+    return attach_story_edges(G, engine)
+
+if __name__ == "__main__":
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # === LOAD & PREPARE ===
+    df = pd.read_excel(os.path.join(DATA_DIR, EXCEL_FILE))
+    story_order = STORY_ORDER + (load_overrides(STORY_ORDER_FILE) if os.path.exists(STORY_ORDER_FILE) else [])
+    G = build_event_kg(df, story_order)
+    for src, tgt, source in G.graph.get("storytime_conflicts", []):
+        print(f"⚠️ Story-time {source} {src} → {tgt} contradicts an earlier constraint; skipped")
+
+    # === EXPORT JSON ===
+    with open(os.path.join(OUTPUT_DIR, "event_kg.json"), "w", encoding="utf-8") as f:
+        json.dump(json_graph.node_link_data(G), f, indent=2, ensure_ascii=False)
+
+    # === VISUALIZE ===
+    pos = layered_layout(G, max_row_nodes=MAX_ROW_NODES)
+    node_labels = {n: d["label"] for n, d in G.nodes(data=True)}
+
+    node_colors = []
+    for _, d in G.nodes(data=True):
+        if d["type"] == "macro_event":
+            node_colors.append("gold")
+        elif d["type"] == "event":
+            node_colors.append("orange")
+        elif d["type"] == "event_segment":
+            node_colors.append("lightgreen")
+        elif d["type"] == "panel":
+            node_colors.append("skyblue")
+        else:
+            node_colors.append("gray")
+
+    plt.figure(figsize=figure_size(pos))
+    nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=1200, edgecolors="black")
+    nx.draw_networkx_labels(G, pos, labels=node_labels, font_size=9)
+
+    edge_labels = nx.get_edge_attributes(G, "relation")
+    edge_styles = {
+        "subevent_of": {"color": "black", "style": "solid"},
+        "instantiates": {"color": "gray", "style": "dashed"},
+        "precedes_storytime": {"color": "red", "style": "solid"},
+        "precedes_reading": {"color": "blue", "style": "dashed"},
+    }
+
+    for rel_type, style in edge_styles.items():
+        edges = [(u, v) for u, v, d in G.edges(data=True) if d["relation"] == rel_type]
+        nx.draw_networkx_edges(G, pos, edgelist=edges, edge_color=style["color"],
+                               arrows=True, arrowstyle="-|>", arrowsize=25,
+                               connectionstyle='arc3,rad=0.2', width=1, style=style["style"])
+        nx.draw_networkx_edge_labels(G, pos,
+            edge_labels={k: v for k, v in edge_labels.items() if k in edges},
+            font_color=style["color"], label_pos=0.6)#, font_size=18)
+
+    plt.title("Hierarchical Event KG with Reading & Narrative Time", fontsize=14)
+    plt.axis("off")
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "event_kg_full.png"), dpi=300)
+    plt.close()
+
+    print("✅ Saved: JSON + PNG with full temporal structure.")
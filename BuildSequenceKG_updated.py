@@ -1,62 +1,59 @@
 import os
 import json
+import time
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
 from networkx.readwrite import json_graph
+from TemporalConstraints import STORY_ORDER, story_constraints, attach_story_edges, load_overrides
 
 # === CONFIG ===
 DATA_DIR = "Data/Annotation_Book_0/"
 EXCEL_FILE = "Story_0_with_IDs.xlsx"
 OUTPUT_DIR = "./output/sequence_kg"
 SUBGRAPH_DIR = os.path.join(OUTPUT_DIR, "subgraphs")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(SUBGRAPH_DIR, exist_ok=True)
-
-# === LOAD DATA ===
-df = pd.read_excel(os.path.join(DATA_DIR, EXCEL_FILE))
-df = df.dropna(subset=["Index", "Plot_1_ID"]).reset_index(drop=True)
-df["Narrative_Time"] = df["Narrative_Time"].fillna(method="ffill")
-
-# === CREATE GRAPH ===
-G = nx.DiGraph()
-event_panels = {}
-
-for _, row in df.iterrows():
-    panel_id = row["Index"]
-    plot1 = row["Plot_1_ID"]
-    plot1_label = row["Plot_1"]
-
-    G.add_node(panel_id, type="panel", label=panel_id)
-    G.add_node(plot1, type="event_segment", label=plot1_label)
-    G.add_edge(panel_id, plot1, relation="belongs_to")
-    event_panels.setdefault(plot1, []).append(panel_id)
-
-# === ADD INTRA-EVENT PANEL SEQUENCES ===
-for panels in event_panels.values():
-    for i in range(len(panels) - 1):
-        G.add_edge(panels[i], panels[i + 1], relation="next")
-
-# === ADD INTER-EVENT READING ORDER (BY PANEL OCCURRENCE) ===
-event_sequence = list(df.drop_duplicates("Plot_1_ID")["Plot_1_ID"])
-for i in range(len(event_sequence) - 1):
-    G.add_edge(event_sequence[i], event_sequence[i + 1], relation="precedes_reading")
-
-# === ADD INTER-EVENT STORYTIME ORDER (FROM NARRATIVE_TIME) ===
-narrative_order = (
-    df.drop_duplicates("Plot_1_ID")[["Plot_1_ID", "Narrative_Time"]]
-    .sort_values(by="Narrative_Time")
-)["Plot_1_ID"].tolist()
-
-for i in range(len(narrative_order) - 1):
-    src = narrative_order[i]
-    tgt = narrative_order[i + 1]
-    if src != tgt:
-        G.add_edge(src, tgt, relation="precedes_storytime")
-
-# === SAVE FULL GRAPH ===
-with open(os.path.join(OUTPUT_DIR, "sequence_kg.json"), "w", encoding="utf-8") as f:
-    json.dump(json_graph.node_link_data(G), f, indent=2, ensure_ascii=False)
+STORY_ORDER_FILE = os.path.join(DATA_DIR, "story_order.csv")  # optional Before,After overrides
+
+# === BUILD ===
+def build_sequence_kg(df, story_order=STORY_ORDER):
+    """
+    Returns the sequence KG and the event -> [panel, ...] map used for subgraphs.
+    """
+    engine = story_constraints(df, story_order)
+    df = df.dropna(subset=["Index", "Plot_1_ID"]).reset_index(drop=True)
+    df["Narrative_Time"] = df["Narrative_Time"].ffill()
+
+    # === CREATE GRAPH ===
+    G = nx.DiGraph()
+    event_panels = {}
+
+    for _, row in df.iterrows():
+        panel_id = row["Index"]
+        plot1 = row["Plot_1_ID"]
+        plot1_label = row["Plot_1"]
+
+        G.add_node(panel_id, type="panel", label=panel_id)
+        G.add_node(plot1, type="event_segment", label=plot1_label)
+        G.add_edge(panel_id, plot1, relation="belongs_to")
+        event_panels.setdefault(plot1, []).append(panel_id)
+
+    # === ADD INTRA-EVENT PANEL SEQUENCES ===
+    for panels in event_panels.values():
+        for i in range(len(panels) - 1):
+            G.add_edge(panels[i], panels[i + 1], relation="next")
+
+    # === ADD INTER-EVENT READING ORDER (BY PANEL OCCURRENCE) ===
+    event_sequence = list(df.drop_duplicates("Plot_1_ID")["Plot_1_ID"])
+    for i in range(len(event_sequence) - 1):
+        G.add_edge(event_sequence[i], event_sequence[i + 1], relation="precedes_reading")
+
+    # === ADD INTER-EVENT STORYTIME ORDER (NARRATIVE_TIME + OVERRIDES, REDUCED) ===
+    attach_story_edges(G, engine)
+
+    return G, event_panels
 
 # === VISUALIZATION FUNCTION ===
 def visualize_graph(graph, file_path, title=""):
@@ -92,18 +89,81 @@ def visualize_graph(graph, file_path, title=""):
     plt.savefig(file_path, dpi=300)
     plt.close()
 
-# === VISUALIZE FULL GRAPH ===
-visualize_graph(G, os.path.join(OUTPUT_DIR, "sequence_kg.png"), "Full Sequence KG")
+# === PER-EVENT SUBGRAPHS ===
+# Forked workers inherit the full sequence KG through this global instead of
+# rebuilding it or pickling it with every job.
+_SHARED = {}
 
-# === EXPORT PER-EVENT SUBGRAPHS ===
-for idx, (event, panels) in enumerate(event_panels.items(), start=1):
-    sub_nodes = panels + [event]
-    G_sub = G.subgraph(sub_nodes).copy()
+def export_event(idx, event, panels, out_dir, render):
+    G_sub = _SHARED["G"].subgraph(panels + [event]).copy()
     prefix = f"{idx:02d}_{event}"
 
-    with open(os.path.join(SUBGRAPH_DIR, f"{prefix}.json"), "w", encoding="utf-8") as f:
+    with open(os.path.join(out_dir, f"{prefix}.json"), "w", encoding="utf-8") as f:
         json.dump(json_graph.node_link_data(G_sub), f, indent=2, ensure_ascii=False)
-
-    visualize_graph(G_sub, os.path.join(SUBGRAPH_DIR, f"{prefix}.png"), f"Subgraph: {event}")
-
-print("✅ Sequence KG + subgraphs saved.")
+    if render:
+        visualize_graph(G_sub, os.path.join(out_dir, f"{prefix}.png"), f"Subgraph: {event}")
+    return prefix
+
+def export_subgraphs(G, event_panels, out_dir=SUBGRAPH_DIR, render_events=None, json_only=False, workers=None):
+    """
+    Write every event subgraph as JSON and render PNGs for all events, only
+    for render_events, or (json_only) none. File numbering follows the event
+    order either way. Returns the number of subgraphs written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    render_events = set(render_events) if render_events else None
+    jobs = [(idx, event, panels, out_dir,
+             not json_only and (render_events is None or event in render_events))
+            for idx, (event, panels) in enumerate(event_panels.items(), start=1)]
+    _SHARED["G"] = G
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1 and "fork" in mp.get_all_start_methods():
+        rendered = [job for job in jobs if job[4]]
+        plain = [job for job in jobs if not job[4]]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("fork")) as pool:
+            # Renders are slow and uneven: one per task, handed out first; JSON-only jobs in chunks
+            futures = [pool.map(export_event, *zip(*batch), chunksize=size)
+                       for batch, size in ((rendered, 1), (plain, max(1, len(plain) // (workers * 4))))
+                       if batch]
+            for results in futures:
+                list(results)
+    else:
+        for job in jobs:
+            export_event(*job)
+    return len(jobs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the sequence KG and export per-event subgraphs.")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--json-only", action="store_true", help="write JSON, skip all PNG rendering")
+    parser.add_argument("--events", nargs="+", default=None,
+                        help="render only these event IDs (JSON is still written for every event)")
+    args = parser.parse_args()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(SUBGRAPH_DIR, exist_ok=True)
+
+    # === LOAD DATA ===
+    df = pd.read_excel(os.path.join(DATA_DIR, EXCEL_FILE))
+    story_order = STORY_ORDER + (load_overrides(STORY_ORDER_FILE) if os.path.exists(STORY_ORDER_FILE) else [])
+    G, event_panels = build_sequence_kg(df, story_order)
+    for src, tgt, source in G.graph.get("storytime_conflicts", []):
+        print(f"⚠️ Story-time {source} {src} → {tgt} contradicts an earlier constraint; skipped")
+
+    # === SAVE FULL GRAPH ===
+    with open(os.path.join(OUTPUT_DIR, "sequence_kg.json"), "w", encoding="utf-8") as f:
+        json.dump(json_graph.node_link_data(G), f, indent=2, ensure_ascii=False)
+
+    # === VISUALIZE FULL GRAPH ===
+    if not args.json_only and not args.events:
+        visualize_graph(G, os.path.join(OUTPUT_DIR, "sequence_kg.png"), "Full Sequence KG")
+
+    # === EXPORT PER-EVENT SUBGRAPHS ===
+    unknown = sorted(set(args.events or []) - set(event_panels))
+    if unknown:
+        print(f"⚠️ Unknown event IDs (not rendered): {', '.join(unknown)}")
+    start = time.perf_counter()
+    n = export_subgraphs(G, event_panels, SUBGRAPH_DIR, args.events, args.json_only, args.workers)
+
+    print(f"✅ Sequence KG + {n} subgraphs saved ({time.perf_counter() - start:.2f}s).")
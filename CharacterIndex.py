@@ -0,0 +1,123 @@
+from ReasoningQueries_updated_2 import get_successors_by_relation
+
+# === CONFIG ===
+HIERARCHY_LEVELS = ["panel", "event_segment", "event", "macro_event"]
+GRAPH_KEY = "character_index"
+
+# === Character → panel / segment / event / macro-event inverted index ===
+class CharacterIndex:
+    """
+    Inverted index from character label to the hierarchy nodes it appears in.
+
+    The backing dict is plain JSON (it lives in G.graph["character_index"] and
+    is saved with node_link_data), so a loaded KG can be queried right away:
+      panels:   panel_id -> {"characters": [...], "event_segment": [...], ...}
+      postings: level -> character -> {node_id: number of panels}
+    The panel counts let upserts retract a character from a segment/event
+    only when its last panel there is removed.
+    """
+
+    def __init__(self, data=None):
+        if data is None:
+            data = {}
+        data.setdefault("panels", {})
+        postings = data.setdefault("postings", {})
+        for level in HIERARCHY_LEVELS:
+            postings.setdefault(level, {})
+        self.data = data
+
+    # === Updates ===
+    def upsert_panel(self, G, panel_id):
+        self.remove_panel(panel_id)
+
+        entry = {"characters": panel_characters(G, panel_id)}
+        entry.update(panel_ancestors(G, panel_id))
+        self.data["panels"][panel_id] = entry
+
+        for char in entry["characters"]:
+            for level in HIERARCHY_LEVELS:
+                nodes = [panel_id] if level == "panel" else entry[level]
+                posting = self.data["postings"][level].setdefault(char, {})
+                for node in nodes:
+                    posting[node] = posting.get(node, 0) + 1
+
+    def remove_panel(self, panel_id):
+        entry = self.data["panels"].pop(panel_id, None)
+        if entry is None:
+            return
+        for char in entry["characters"]:
+            for level in HIERARCHY_LEVELS:
+                nodes = [panel_id] if level == "panel" else entry[level]
+                posting = self.data["postings"][level].get(char, {})
+                for node in nodes:
+                    count = posting.get(node, 0) - 1
+                    if count > 0:
+                        posting[node] = count
+                    else:
+                        posting.pop(node, None)
+                if not posting:
+                    self.data["postings"][level].pop(char, None)
+
+    # === Queries (O(output)) ===
+    def lookup(self, character, level="panel"):
+        return list(self.data["postings"][level].get(character, {}))
+
+    def characters(self):
+        return list(self.data["postings"]["panel"])
+
+    def by_level(self, level="panel"):
+        return {char: list(nodes) for char, nodes in self.data["postings"][level].items()}
+
+
+# === Graph helpers ===
+def panel_characters(G, panel_id):
+    panel_visual = f"Panel_visual_{panel_id}"
+    if panel_visual not in G:
+        return []
+    chars = []
+    for c in get_successors_by_relation(G, panel_visual, "has_character", "character"):
+        label = G.nodes[c].get("label", c).strip()
+        if label not in chars:
+            chars.append(label)
+    return chars
+
+def panel_ancestors(G, panel_id):
+    """
+    Walk panel →instantiates→ event_segment →subevent_of→ event →subevent_of→ macro_event
+    """
+    segments = get_successors_by_relation(G, panel_id, "instantiates", "event_segment")
+    events, macros = [], []
+    for seg in segments:
+        for ev in get_successors_by_relation(G, seg, "subevent_of", "event"):
+            if ev not in events:
+                events.append(ev)
+    for ev in events:
+        for macro in get_successors_by_relation(G, ev, "subevent_of", "macro_event"):
+            if macro not in macros:
+                macros.append(macro)
+    return {"event_segment": segments, "event": events, "macro_event": macros}
+
+def build_character_index(G):
+    index = CharacterIndex()
+    for n, d in G.nodes(data=True):
+        if d.get("type") == "panel":
+            index.upsert_panel(G, n)
+    return index
+
+def attach_character_index(G, index=None):
+    """
+    Store the index on the graph so it is saved with the KG.
+    """
+    if index is None:
+        index = CharacterIndex()
+    G.graph[GRAPH_KEY] = index.data
+    return index
+
+def get_character_index(G):
+    """
+    Return the index carried by the KG, building (and attaching) it for
+    KGs that were integrated before the index existed.
+    """
+    if GRAPH_KEY in G.graph:
+        return CharacterIndex(G.graph[GRAPH_KEY])
+    return attach_character_index(G, build_character_index(G))
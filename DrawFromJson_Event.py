@@ -1,6 +1,9 @@
 import json
 import networkx as nx
 import matplotlib.pyplot as plt
+from LayeredLayout import layered_layout
+
+MAX_ROW_NODES = 40  # wrap wide layers into rows of at most this many panels
 
 # Load the JSON
 with open("Data/KGs_Book_0/event_kg/event_kg_partial_33nodes_visual.json", "r") as f:
@@ -41,23 +44,8 @@ for node in data["nodes"]:
 for edge in data["links"]:
     G.add_edge(edge["source"], edge["target"], label=edge["relation"])
 
-# === LAYOUT ===
-def layered_layout(G):
-    layers = {"macro_event": 0, "event": 1, "event_segment": 2, "panel": 3}
-    spacing_x = 6
-    spacing_y = 6
-    pos = {}
-    layer_counts = {k: 0 for k in layers}
-    for n, d in G.nodes(data=True):
-        layer = layers.get(d["type"], 4)
-        x = layer_counts[d["type"]] * spacing_x
-        y = -layer * spacing_y
-        pos[n] = (x, y)
-        layer_counts[d["type"]] += 1
-    return pos
-
 # Draw
-pos = layered_layout(G)
+pos = layered_layout(G, spacing_x=6, spacing_y=6, max_row_nodes=MAX_ROW_NODES, relation_key="label")
 plt.figure(figsize=(28, 20))
 nx.draw(
     G, pos, with_labels=False, node_color="#D6EAF8", node_size=3000, edge_color="gray", arrows=True
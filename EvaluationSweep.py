@@ -0,0 +1,101 @@
+import io
+import os
+import time
+import argparse
+import itertools
+from pathlib import Path
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from ResultCache import ResultCache
+from RunReasoningTasks import VARIANTS, TASKS, run_tasks
+from PartialMatchEval import evaluate_task
+from BootstrapStats import bootstrap_ci
+
+# === CONFIG ===
+BOOKS = ["0", "1"]
+RESULTS_PATH = "Data/sweep_results.csv"
+
+# === One cell = reasoning + evaluation for (book, variant, task) ===
+def run_cell(book, variant, task, force=False, use_cache=True, bootstrap=0):
+    cache = ResultCache(force=force, enabled=use_cache)
+    row = {"Book": book, "Variant": variant, "Task": task}
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(io.StringIO()):
+            run_tasks(book, variant, [task], workers=1, cache=cache)
+            reasoned = time.perf_counter()
+            detailed, summary = evaluate_task(book, task, variant, with_lists=False, cache=cache)
+            if bootstrap:
+                summary.update(bootstrap_ci(detailed, n_resamples=bootstrap))
+    except Exception as e:  # one missing KG / CSV should not stop the sweep
+        row.update(Status=f"error: {type(e).__name__}: {e}", Total_s=time.perf_counter() - start)
+        return row
+    done = time.perf_counter()
+
+    for key in ("Book", "Variant"):
+        summary.pop(key, None)
+    row["Task_Name"] = summary.pop("Task")
+    row.update(summary)
+    row.update(Status="ok", Cache_Hits=len(cache.hits), Cache_Misses=len(cache.misses),
+               Reason_s=reasoned - start, Eval_s=done - reasoned, Total_s=done - start)
+    return row
+
+def sweep(books, variants, tasks, workers=None, force=False, use_cache=True, bootstrap=0):
+    """
+    Run every (book, variant, task) cell in a process pool; one row per cell.
+    """
+    cells = list(itertools.product(books, variants, tasks))
+    workers = min(workers or os.cpu_count() or 1, len(cells))
+    rows = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_cell, *cell, force, use_cache, bootstrap): cell for cell in cells}
+            for future in as_completed(futures):
+                rows.append(future.result())
+                _progress(rows[-1], len(rows), len(cells))
+    else:
+        for cell in cells:
+            rows.append(run_cell(*cell, force, use_cache, bootstrap))
+            _progress(rows[-1], len(rows), len(cells))
+
+    table = pd.DataFrame(rows).sort_values(["Book", "Variant", "Task"]).reset_index(drop=True)
+    first = ["Book", "Variant", "Task", "Task_Name", "Status", "Rows"]
+    timing = ["Reason_s", "Eval_s", "Total_s", "Cache_Hits", "Cache_Misses"]
+    middle = [c for c in table.columns if c not in first + timing]
+    return table[[c for c in first + middle + timing if c in table.columns]]
+
+def _progress(row, done, total):
+    status = row["Status"] if row["Status"] != "ok" else f"F1 {row['Macro_F1']:.2f}"
+    print(f"[{done}/{total}] book {row['Book']} / {row['Variant']} / task {row['Task']}: "
+          f"{status} ({row['Total_s']:.2f}s)")
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reasoning + evaluation over books x KG variants x tasks.")
+    parser.add_argument("--books", nargs="+", default=BOOKS)
+    parser.add_argument("--variants", nargs="+", default=sorted(VARIANTS), choices=sorted(VARIANTS))
+    parser.add_argument("--tasks", type=int, nargs="+", default=sorted(TASKS), choices=sorted(TASKS))
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--bootstrap", type=int, default=0, help="bootstrap resamples for CIs (0 = off)")
+    parser.add_argument("--out", default=RESULTS_PATH)
+    parser.add_argument("--force", action="store_true", help="recompute even when cached results exist")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the result cache")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = sweep(args.books, args.variants, args.tasks, args.workers, args.force, not args.no_cache,
+                  args.bootstrap)
+    wall = time.perf_counter() - start
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    table.round(4).to_csv(args.out, index=False)
+
+    ok = table[table["Status"] == "ok"]
+    if len(ok):
+        print("\n=== Macro F1 ===")
+        print(ok.pivot_table(index=["Book", "Variant"], columns="Task", values="Macro_F1").round(3).to_string())
+    print(f"\n✅ {len(ok)}/{len(table)} cells ok, {wall:.2f}s wall for {table['Total_s'].sum():.2f}s of cell time")
+    print(f"✅ Sweep results saved to {args.out}")
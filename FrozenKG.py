@@ -0,0 +1,271 @@
+import sys
+import json
+import time
+import tracemalloc
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+from ReasoningQueries_updated_2 import sort_by_reading_order
+import ReasoningQueries_updated_2 as rq
+
+# === CONFIG ===
+KG_PATH = "Data/KGs_Book_0/integrated_kg.json"
+
+
+# === Read-only compact KG ===
+class FrozenKG:
+    """
+    Immutable, array-backed view of an integrated KG for the query layer.
+
+    Nodes are dense ints. Node types and edge relations are small integer
+    codes and labels live once in a string pool. Adjacency is CSR in both
+    directions; inside a node's range, edges are sorted by
+    key = relation_code * n_types + neighbour_type_code, so a
+    "relation + neighbour type" hop is two bisections and a slice instead of
+    a walk over per-edge attribute dicts.
+    """
+
+    def __init__(self, nodes, types, labels, edges, graph=None):
+        """
+        nodes: [node_id]; types / labels: per-node strings (or None);
+        edges: [(u_index, v_index, relation)]
+        """
+        self.nodes = list(nodes)
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+        self.graph = graph or {}
+
+        self.type_vocab, type_codes = _encode(types)
+        self.label_pool, label_codes = _encode(labels)
+        self.relation_vocab, rel_codes = _encode([r for _, _, r in edges])
+        self._type_code = {t: i for i, t in enumerate(self.type_vocab)}
+        self._rel_code = {r: i for i, r in enumerate(self.relation_vocab)}
+
+        node_type = np.asarray(type_codes, dtype=np.int32)
+        src = np.fromiter((u for u, _, _ in edges), dtype=np.int32, count=len(edges))
+        dst = np.fromiter((v for _, v, _ in edges), dtype=np.int32, count=len(edges))
+        rel = np.asarray(rel_codes, dtype=np.int32)
+        n, n_types = len(self.nodes), max(len(self.type_vocab), 1)
+
+        self.n_types = n_types
+        self.node_type = _pack("h", node_type)
+        self.node_label = _pack("i", label_codes)
+        self.out_ptr, self.out_nbr, self.out_key = _csr(src, dst, rel * n_types + node_type[dst], n)
+        self.in_ptr, self.in_nbr, self.in_key = _csr(dst, src, rel * n_types + node_type[src], n)
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        return len(self.out_nbr)
+
+    def node_type_of(self, node):
+        return self.type_vocab[self.node_type[self.index[node]]]
+
+    def label_of(self, node, default=None):
+        label = self.label_pool[self.node_label[self.index[node]]]
+        return default if label is None else label
+
+    def nodes_of_type(self, node_type):
+        code = self._type_code.get(node_type)
+        return [n for n, t in zip(self.nodes, self.node_type) if t == code]
+
+    def _hop(self, ptr, nbr, keys, node, relation, node_type):
+        i = self.index.get(node)
+        if i is None:
+            return []
+        t = self._type_code.get(node_type, -1) if node_type else None
+        lo, hi = ptr[i], ptr[i + 1]
+
+        if relation is None:
+            return [self.nodes[j] for j in nbr[lo:hi]
+                    if t is None or self.node_type[j] == t]
+
+        r = self._rel_code.get(relation)
+        if r is None or t == -1:
+            return []
+        k0 = r * self.n_types + (t if t is not None else 0)
+        k1 = k0 + 1 if t is not None else k0 + self.n_types
+        a = bisect_left(keys, k0, lo, hi)
+        b = bisect_left(keys, k1, a, hi)
+        return [self.nodes[j] for j in nbr[a:b]]
+
+    def successors(self, node, relation=None, target_type=None):
+        return self._hop(self.out_ptr, self.out_nbr, self.out_key, node, relation, target_type)
+
+    def predecessors(self, node, relation=None, source_type=None):
+        return self._hop(self.in_ptr, self.in_nbr, self.in_key, node, relation, source_type)
+
+    def edges_by_relation(self, relation):
+        """
+        (source, target) pairs for every edge with this relation.
+        """
+        r = self._rel_code.get(relation)
+        if r is None:
+            return []
+        keys = np.frombuffer(self.out_key, dtype=np.int32)
+        edge_ids = np.flatnonzero(keys // self.n_types == r)
+        sources = np.searchsorted(np.frombuffer(self.out_ptr, dtype=np.int64), edge_ids, side="right") - 1
+        return [(self.nodes[u], self.nodes[self.out_nbr[e]]) for u, e in zip(sources, edge_ids)]
+
+    def nbytes(self):
+        arrays = (self.node_type, self.node_label, self.out_ptr, self.out_nbr, self.out_key,
+                  self.in_ptr, self.in_nbr, self.in_key)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+def _encode(values):
+    vocab, codes, lookup = [], [], {}
+    for v in values:
+        if v not in lookup:
+            lookup[v] = len(vocab)
+            vocab.append(v)
+        codes.append(lookup[v])
+    return vocab, codes
+
+def _pack(typecode, values):
+    """
+    numpy / list -> compact array.array (cheap scalar indexing from Python).
+    """
+    dtype = {"h": np.int16, "i": np.int32, "q": np.int64}[typecode]
+    packed = array(typecode)
+    packed.frombytes(np.asarray(values, dtype=dtype).tobytes())
+    return packed
+
+def _csr(src, dst, key, n):
+    order = np.lexsort((key, src))
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=ptr[1:])
+    return _pack("q", ptr), _pack("i", dst[order]), _pack("i", key[order])
+
+
+# === Builders ===
+def freeze_kg(G):
+    nodes = list(G.nodes)
+    index = {n: i for i, n in enumerate(nodes)}
+    types = [G.nodes[n].get("type") for n in nodes]
+    labels = [G.nodes[n].get("label") for n in nodes]
+    edges = [(index[u], index[v], d.get("relation")) for u, v, d in G.edges(data=True)]
+    return FrozenKG(nodes, types, labels, edges, dict(G.graph))
+
+def freeze_node_link(data):
+    """
+    Build straight from node-link JSON records, without a networkx graph.
+    """
+    links = data.get("links", data.get("edges", []))
+    nodes = [rec["id"] for rec in data["nodes"]]
+    index = {n: i for i, n in enumerate(nodes)}
+    types = [rec.get("type") for rec in data["nodes"]]
+    labels = [rec.get("label") for rec in data["nodes"]]
+    edges = [(index[e["source"]], index[e["target"]], e.get("relation")) for e in links]
+    return FrozenKG(nodes, types, labels, edges, data.get("graph", {}))
+
+def load_frozen_kg(path=KG_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return freeze_node_link(json.load(f))
+
+
+# === Helper API (same names / signatures as ReasoningQueries_updated_2) ===
+def get_successors_by_relation(FK, node, relation, target_type=None):
+    return FK.successors(node, relation, target_type)
+
+def get_predecessors_by_relation(FK, node, relation, source_type=None):
+    return FK.predecessors(node, relation, source_type)
+
+def _panels_under(FK, node, levels):
+    if not levels:
+        return FK.predecessors(node, "instantiates", "panel")
+    panels = []
+    for child in FK.predecessors(node, "subevent_of", levels[0]):
+        panels.extend(_panels_under(FK, child, levels[1:]))
+    return panels
+
+# === TASK 1: Action Retrieval by Macro-event
+def get_actions_by_macro_event(FK, macro_event_id):
+    actions = set()
+    for panel in _panels_under(FK, macro_event_id, ["event", "event_segment"]):
+        panel_visual = f"Panel_visual_{panel}"
+        if panel_visual in FK:
+            for act in FK.successors(panel_visual, "has_action", "action"):
+                label = FK.label_of(act)
+                if label:
+                    actions.add(label)
+    return sorted(actions)
+
+# === TASK 2: Dialogue Trace by Event
+def get_dialogues_by_event(FK, event_id):
+    lines = set()
+    for panel in _panels_under(FK, event_id, ["event_segment"]):
+        pt_node = f"Panel_textual_{panel}"
+        if pt_node not in FK:
+            continue
+        for dlg in FK.predecessors(pt_node, "part_of", "dialogue"):
+            for t in FK.predecessors(dlg, None, "text"):
+                label = FK.label_of(t)
+                if label:
+                    lines.add(label)
+    return sorted(lines)
+
+# === TASK 3: Character Appearance Mapping
+def get_character_appearances(FK):
+    char_index = FK.graph.get("character_index")
+    if char_index:
+        return {label: list(panels) for label, panels in char_index["postings"]["panel"].items()}
+
+    appearances = {}
+    for u, v in FK.edges_by_relation("has_character"):
+        if FK.node_type_of(u) != "panel_visual" or FK.node_type_of(v) != "character":
+            continue
+        if not u.startswith("Panel_visual_"):
+            continue
+        label = FK.label_of(v, v).strip()
+        appearances.setdefault(label, []).append(u.replace("Panel_visual_", ""))
+    return appearances
+
+# === TASK 4: Panel Timeline by Macro-event
+def get_panels_by_macro_event(FK, macro_event_id):
+    panels = _panels_under(FK, macro_event_id, ["event", "event_segment"])
+    return sort_by_reading_order(FK, panels)
+
+
+# === MAIN: memory / per-hop comparison against the networkx graph ===
+def _measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+def _hop_time(fn, nodes, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for n in nodes:
+            fn(n)
+    return (time.perf_counter() - start) / (repeats * max(len(nodes), 1))
+
+if __name__ == "__main__":
+    kg_path = sys.argv[1] if len(sys.argv) > 1 else KG_PATH
+    with open(kg_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    from networkx.readwrite import json_graph
+    G, g_mem, _, g_time = _measure(lambda: json_graph.node_link_graph(data))
+    FK, f_mem, _, f_time = _measure(lambda: freeze_node_link(data))
+
+    segments = FK.nodes_of_type("event_segment")
+    nx_hop = _hop_time(lambda s: rq.get_predecessors_by_relation(G, s, "instantiates", "panel"), segments)
+    fk_hop = _hop_time(lambda s: get_predecessors_by_relation(FK, s, "instantiates", "panel"), segments)
+
+    print(f"KG: {kg_path} ({len(FK)} nodes, {FK.number_of_edges()} edges)")
+    print(f"networkx DiGraph : {g_mem / 1e6:8.2f} MB, built in {g_time:.3f}s")
+    print(f"FrozenKG         : {f_mem / 1e6:8.2f} MB, built in {f_time:.3f}s "
+          f"(arrays {FK.nbytes() / 1e6:.2f} MB)")
+    print(f"Memory ratio     : {g_mem / max(f_mem, 1):.1f}x")
+    print(f"Per-hop          : networkx {nx_hop * 1e6:.2f}us, FrozenKG {fk_hop * 1e6:.2f}us "
+          f"({nx_hop / max(fk_hop, 1e-12):.1f}x)")
@@ -0,0 +1,154 @@
+import string
+
+import numpy as np
+import pandas as pd
+
+# === CONFIG ===
+SHINGLE_K = 4              # character n-grams
+NUM_PERM = 64              # MinHash signature length
+BANDS = 16                 # LSH bands of NUM_PERM // BANDS rows (candidate threshold ~0.5)
+FUZZY_THRESHOLD = 0.7      # estimated Jaccard needed to count as a match
+SEED = 0
+MAX_CELLS = 2_000_000      # permutations x shingles hashed at once (small chunks stay in cache)
+FUZZY_METRICS = ["Fuzzy_Precision", "Fuzzy_Recall", "Fuzzy_F1"]
+
+_SHIFT = np.uint64(32)
+_DROP_PUNCT = str.maketrans({c: " " for c in string.punctuation + "…‘’“”–—"})
+
+# === Shingling ===
+def normalize_line(line):
+    """
+    Lowercase, punctuation dropped, whitespace collapsed ("Okay..." == "okay").
+    """
+    return " ".join(line.lower().translate(_DROP_PUNCT).split())
+
+def shingle_hashes(lines, k=SHINGLE_K):
+    """
+    Hashes of every character k-gram of every (normalized) line, computed on
+    the concatenated UTF-32 code points in one pass: (flat hashes, starts)
+    with line i's shingles in flat[starts[i]:starts[i + 1]]. Lines shorter
+    than k are padded, so they are one shingle. Deterministic across
+    processes, unlike hash().
+    """
+    texts = [normalize_line(line).ljust(k, "\x01") for line in lines]
+    codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    # Window starts that stay inside their line: L - k + 1 per line
+    windows = lengths - k + 1
+    starts = np.concatenate(([0], np.cumsum(windows)))
+    first = np.repeat(offsets[:-1] - starts[:-1], windows) + np.arange(starts[-1])
+
+    h = np.zeros(len(first), dtype=np.uint64)
+    for t in range(k):  # polynomial hash of the window, wrapping in uint64
+        h = h * np.uint64(1_000_003) + codes[first + t]
+    # murmur3 finalizer to spread the bits, then keep the top 32
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xFF51AFD7ED558CCD)
+    h ^= h >> np.uint64(33)
+    return h >> _SHIFT, starts
+
+# === MinHash ===
+def minhash_signatures(lines, num_perm=NUM_PERM, seed=SEED):
+    """
+    (len(lines), num_perm) uint32 signatures. Permutation i is the
+    multiply-shift hash (a_i * x + b_i) >> 32 (odd 64-bit a_i, wrapping), so
+    a chunk of lines is hashed by one in-place multiply / add / shift over a
+    (num_perm, shingles) block and min-reduced per line.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)[:, None] * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)[:, None]
+    flat, starts = shingle_hashes(lines)
+
+    signatures = np.empty((len(lines), num_perm), dtype=np.uint32)
+    lo = 0
+    while lo < len(lines):
+        # Largest run of lines whose shingles fit in MAX_CELLS (at least one line)
+        hi = int(np.searchsorted(starts, starts[lo] + MAX_CELLS // num_perm, side="right")) - 1
+        hi = min(max(hi, lo + 1), len(lines))
+        block = flat[starts[lo]:starts[hi]]
+        hashed = a * block[None, :]
+        hashed += b
+        hashed >>= _SHIFT
+        signatures[lo:hi] = np.minimum.reduceat(hashed, starts[lo:hi] - starts[lo], axis=1).T
+        lo = hi
+    return signatures
+
+# === LSH banding ===
+def lsh_candidates(sig_a, group_a, sig_b, group_b, bands=BANDS, seed=SEED):
+    """
+    (i, j) index pairs with group_a[i] == group_b[j] whose signatures agree on
+    every row of at least one band.
+    """
+    rows = sig_a.shape[1] // bands
+    mult = np.random.default_rng(seed + 1).integers(1, 1 << 62, size=rows, dtype=np.uint64)
+    pairs = []
+    for band in range(bands):
+        cols = slice(band * rows, (band + 1) * rows)
+        key_a = (sig_a[:, cols].astype(np.uint64) * mult).sum(axis=1)  # wraps: a cheap band hash
+        key_b = (sig_b[:, cols].astype(np.uint64) * mult).sum(axis=1)
+        left = pd.DataFrame({"g": group_a, "k": key_a, "i": np.arange(len(sig_a))})
+        right = pd.DataFrame({"g": group_b, "k": key_b, "j": np.arange(len(sig_b))})
+        pairs.append(left.merge(right, on=["g", "k"])[["i", "j"]])
+    if not pairs:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pairs = pd.concat(pairs, ignore_index=True).drop_duplicates()
+    return pairs["i"].to_numpy(), pairs["j"].to_numpy()
+
+def estimated_jaccard(sig_a, sig_b, i, j, chunk=1_000_000):
+    out = np.empty(len(i))
+    for lo in range(0, len(i), chunk):
+        hi = lo + chunk
+        out[lo:hi] = (sig_a[i[lo:hi]] == sig_b[j[lo:hi]]).mean(axis=1)
+    return out
+
+# === Scoring ===
+def fuzzy_scores(gt_items, pred_items, threshold=FUZZY_THRESHOLD):
+    """
+    Per-id fuzzy P / R / F1 over exploded (id, item) tables: a predicted line
+    is correct if some GT line of the same id has estimated Jaccard >= threshold
+    (and vice versa for recall).
+    """
+    gt = gt_items[["id", "item"]].drop_duplicates().reset_index(drop=True)
+    pred = pred_items[["id", "item"]].drop_duplicates().reset_index(drop=True)
+    id_codes, ids = pd.factorize(pd.concat([gt["id"], pred["id"]], ignore_index=True))
+    gt_group, pred_group = id_codes[:len(gt)], id_codes[len(gt):]
+
+    # One signature per distinct line across GT and predictions
+    line_codes, lines = pd.factorize(pd.concat([gt["item"], pred["item"]], ignore_index=True))
+    signatures = minhash_signatures(lines.tolist())
+    sig_gt, sig_pred = signatures[line_codes[:len(gt)]], signatures[line_codes[len(gt):]]
+
+    i, j = lsh_candidates(sig_gt, gt_group, sig_pred, pred_group)
+    sim = estimated_jaccard(sig_gt, sig_pred, i, j)
+    i, j = i[sim >= threshold], j[sim >= threshold]
+
+    n_ids = len(ids)
+    n_gt = np.bincount(gt_group, minlength=n_ids).astype(float)
+    n_pred = np.bincount(pred_group, minlength=n_ids).astype(float)
+    hit_gt = np.bincount(gt_group[np.unique(i)], minlength=n_ids).astype(float)
+    hit_pred = np.bincount(pred_group[np.unique(j)], minlength=n_ids).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(n_pred > 0, hit_pred / n_pred, 0.0)
+        recall = np.where(n_gt > 0, hit_gt / n_gt, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return pd.DataFrame({
+        "ID": np.asarray(ids, dtype=str), "Fuzzy_Hit_GT": hit_gt, "Fuzzy_Hit_PRED": hit_pred,
+        "Fuzzy_N_GT": n_gt, "Fuzzy_N_PRED": n_pred,
+        "Fuzzy_Precision": precision, "Fuzzy_Recall": recall, "Fuzzy_F1": f1,
+    })
+
+def fuzzy_summary(scores):
+    """
+    Macro (mean of rows) and micro (pooled hits) fuzzy P / R / F1.
+    """
+    out = {f"Macro_{m}": float(scores[m].mean()) if len(scores) else 0.0 for m in FUZZY_METRICS}
+    n_gt, n_pred = float(scores["Fuzzy_N_GT"].sum()), float(scores["Fuzzy_N_PRED"].sum())
+    p = float(scores["Fuzzy_Hit_PRED"].sum()) / n_pred if n_pred else 0.0
+    r = float(scores["Fuzzy_Hit_GT"].sum()) / n_gt if n_gt else 0.0
+    out["Micro_Fuzzy_Precision"] = p
+    out["Micro_Fuzzy_Recall"] = r
+    out["Micro_Fuzzy_F1"] = 2 * p * r / (p + r) if (p + r) else 0.0
+    return out
@@ -0,0 +1,140 @@
+import os
+import csv
+import json
+import time
+import argparse
+from collections import defaultdict
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# === CONFIG ===
+EXCEL_PATH = "Data/Annotation_Book_{book}/Story_{book}_with_IDs.xlsx"
+PANEL_JSON_DIR = "Data/Annotation_Book_{book}/"
+OUTPUT_DIR = "Data/KGs_Book_{book}"
+OUTPUT_FILES = {
+    1: "ground_truth_task1_actions.csv",
+    2: "ground_truth_task2_dialogues.csv",
+    3: "ground_truth_task3_characters.csv",
+    4: "ground_truth_task4_panels.csv",
+}
+
+# === Per-page parsing (runs in workers) ===
+def action_verb(action):
+    """
+    "A verb B" -> verb, "verb" -> verb, anything else -> None
+    """
+    parts = action.strip().split()
+    if len(parts) == 3:
+        return parts[1] or None
+    if len(parts) == 1:
+        return parts[0] or None
+    return None
+
+def parse_page(json_path):
+    """
+    One {book}_{page}.json -> {panel_id: {"actions", "dialogues", "characters"}}
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    page_id = Path(json_path).stem
+    panels = {}
+    for i, panel in enumerate(data.get("panels", [])):
+        actions = [action_verb(a) for a in panel.get("actions", []) if isinstance(a, str)]
+        dialogues = [line.strip() for line in panel.get("textual", {}).get("dialogues", [])
+                     if isinstance(line, str) and line.strip()]
+        characters = [c.strip() for c in panel.get("characters", [])
+                      if isinstance(c, str) and c.strip()]
+        panels[f"{page_id}_{i}"] = {
+            "actions": [a for a in actions if a],
+            "dialogues": dialogues,
+            "characters": characters,
+        }
+    return panels
+
+def iter_panels(json_files, workers=1):
+    """
+    Stream parsed pages; big books are parsed in a worker pool.
+    """
+    if workers > 1 and len(json_files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(json_files) // (workers * 4))
+            for panels in pool.map(parse_page, json_files, chunksize=chunksize):
+                yield panels
+    else:
+        for json_file in json_files:
+            yield parse_page(json_file)
+
+# === Single pass ===
+def generate_ground_truth(book, workers=1, excel_path=None, json_dir=None, out_dir=None):
+    excel_path = excel_path or EXCEL_PATH.format(book=book)
+    json_dir = json_dir or PANEL_JSON_DIR.format(book=book)
+    out_dir = out_dir or OUTPUT_DIR.format(book=book)
+
+    # === Step 1: Excel read once → panel → macro-event / event
+    df = pd.read_excel(excel_path)
+    df = df.dropna(subset=["Index"])
+    index = df["Index"].astype(str).str.strip()
+    has_macro = df["Plot_0"].notna()
+    has_event = df["Plot_1_ID"].notna()
+    macro_pairs = list(zip(index[has_macro], df.loc[has_macro, "Plot_0"].astype(str).str.strip()))
+    panel_to_macro = dict(macro_pairs)
+    panel_to_event = dict(zip(index[has_event], df.loc[has_event, "Plot_1_ID"].astype(str).str.strip()))
+
+    # Task 4: panels per macro-event in annotation (reading) order
+    macro_to_panels = defaultdict(list)
+    for panel_id, macro in macro_pairs:
+        macro_to_panels[macro].append(panel_id)
+
+    # === Step 2: one pass over the panel JSONs for Tasks 1-3
+    macro_to_actions = defaultdict(set)
+    event_to_dialogues = defaultdict(set)
+    event_to_characters = defaultdict(set)
+
+    json_files = sorted(str(p) for p in Path(json_dir).glob(f"{book}_*.json"))
+    for panels in iter_panels(json_files, workers):
+        for panel_id, content in panels.items():
+            macro = panel_to_macro.get(panel_id)
+            if macro:
+                macro_to_actions[macro].update(content["actions"])
+            event_id = panel_to_event.get(panel_id)
+            if event_id:
+                event_to_dialogues[event_id].update(content["dialogues"])
+                event_to_characters[event_id].update(content["characters"])
+
+    # === Step 3: write all four CSVs
+    os.makedirs(out_dir, exist_ok=True)
+    tables = {
+        1: (["Macro_event", "Actions"], macro_to_actions, "; ", sorted),
+        2: (["Event", "Dialogues"], event_to_dialogues, " | ", sorted),
+        3: (["Event", "Characters"], event_to_characters, " | ", sorted),
+        4: (["Macro_event", "Panels"], macro_to_panels, " | ", list),
+    }
+    paths = {}
+    for task, (header, groups, sep, order) in tables.items():
+        paths[task] = os.path.join(out_dir, OUTPUT_FILES[task])
+        with open(paths[task], "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for key, items in sorted(groups.items()):
+                if not items:
+                    continue
+                writer.writerow([key, sep.join(order(items))])
+    return paths, len(json_files)
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Task 1-4 ground truth in one pass.")
+    parser.add_argument("--book", default="1")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--excel", default=None, help=f"default: {EXCEL_PATH}")
+    parser.add_argument("--json-dir", default=None, help=f"default: {PANEL_JSON_DIR}")
+    parser.add_argument("--out-dir", default=None, help=f"default: {OUTPUT_DIR}")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths, n_pages = generate_ground_truth(args.book, args.workers, args.excel, args.json_dir, args.out_dir)
+    for task, path in paths.items():
+        print(f"✅ Task {task} ground truth saved to: {path}")
+    print(f"Parsed {n_pages} pages in {time.perf_counter() - start:.2f}s")
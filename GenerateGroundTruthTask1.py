@@ -26,7 +26,7 @@ for _, row in df.iterrows():
 
 # === Step 2: Read panel JSONs to extract action verbs ===
 panel_to_actions = defaultdict(list)
-json_files = sorted(Path(PANEL_JSON_DIR).glob(BOOK_ID + "_*.json"))
+json_files = sorted(Path(PANEL_JSON_DIR).glob(f"{BOOK_ID}_*.json"))
 
 for json_file in json_files:
     with open(json_file, "r", encoding="utf-8") as f:
@@ -19,9 +19,8 @@ for _, row in df.iterrows():
     macro_id = str(row["Plot_0"]).strip()
     macro_to_panels[macro_id].append(panel_id)
 
-# === Step 3: Sort panels within each macro-event (reading order)
-for macro_id in macro_to_panels:
-    macro_to_panels[macro_id] = sorted(macro_to_panels[macro_id])
+# === Step 3: Panels within each macro-event stay in annotation row order,
+# which is the reading order (a plain sorted() puts 0_10_0 before 0_2_0)
 
 # === Step 4: Write to CSV ===
 os.makedirs(os.path.dirname(OUTPUT_CSV_PATH), exist_ok=True)
@@ -12,8 +12,6 @@ DATA_DIR = "Data/Annotation_Book_0/"
 EXCEL_FILE = "Story_0_with_IDs.xlsx"
 OUTPUT_DIR = "./output/graphs"
 IMG_DIR = "./output/visualizations"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(IMG_DIR, exist_ok=True)
 
 # === COLOR UTILS ===
 def generate_bright_color():
@@ -157,6 +155,8 @@ def build_panel_graph(panel, panel_id, metadata_row):
 
 # === MAIN ===
 def main():
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(IMG_DIR, exist_ok=True)
     metadata = pd.read_excel(os.path.join(DATA_DIR, EXCEL_FILE))
     metadata.set_index("Index", inplace=True)
 
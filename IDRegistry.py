@@ -0,0 +1,130 @@
+import os
+import json
+
+import pandas as pd
+
+# === CONFIG ===
+# level -> (label column, ID column)
+LEVELS = {"event_segment": ("Plot_2", "Plot_2_ID"), "event": ("Plot_1", "Plot_1_ID")}
+# Event IDs spell out their label ("Intro_2"), so a relabelled event is a new event;
+# a segment keeps its segNNN through a Plot_2 text fix as long as its panels match
+SAME_LABEL = {"event_segment": False, "event": True}
+MIN_OVERLAP = 0.5  # panel Jaccard needed to count an edited span as the same span
+REGISTRY_SUFFIX = ".ids.json"
+
+def registry_path(output_path):
+    """
+    "Story_0_with_IDs.xlsx" -> "Story_0_with_IDs.ids.json"
+    """
+    return os.path.splitext(output_path)[0] + REGISTRY_SUFFIX
+
+# === Spans ===
+def spans(df, level):
+    """
+    {ID: {"label": ..., "panels": [Index, ...]}} in reading order of the first panel.
+    """
+    label_col, id_col = LEVELS[level]
+    groups = df.groupby(id_col, sort=False)
+    labels = groups[label_col].first().astype(str)
+    panels = groups["Index"].agg(lambda s: s.astype(str).tolist())
+    return {str(i): {"label": labels[i], "panels": panels[i]} for i in labels.index}
+
+def match_spans(old, new, same_label=True, min_overlap=MIN_OVERLAP):
+    """
+    {new ID: old ID} by shared panels: candidate pairs are the (old, new) spans
+    with panel Jaccard >= min_overlap (and equal labels with same_label),
+    taken greedily with equal labels first, then by Jaccard. Identical spans
+    (Jaccard 1, same label) are therefore always kept.
+    """
+    if not old or not new:
+        return {}
+    old_panels = pd.DataFrame([(i, p) for i, e in old.items() for p in e["panels"]], columns=["old", "panel"])
+    new_panels = pd.DataFrame([(i, p) for i, e in new.items() for p in e["panels"]], columns=["new", "panel"])
+    pairs = old_panels.merge(new_panels, on="panel").groupby(["old", "new"], sort=False).size()
+    pairs = pairs.rename("shared").reset_index()
+    if pairs.empty:
+        return {}
+    old_size = pairs["old"].map({i: len(e["panels"]) for i, e in old.items()})
+    new_size = pairs["new"].map({i: len(e["panels"]) for i, e in new.items()})
+    pairs["jaccard"] = pairs["shared"] / (old_size + new_size - pairs["shared"])
+    pairs["same_label"] = pairs["old"].map(lambda i: old[i]["label"]) == pairs["new"].map(lambda i: new[i]["label"])
+    pairs = pairs[pairs["jaccard"] >= min_overlap]
+    if same_label:
+        pairs = pairs[pairs["same_label"]]
+    pairs = pairs.sort_values(["same_label", "jaccard"], ascending=False, kind="stable")
+
+    mapping, used = {}, set()
+    for o, n in zip(pairs["old"], pairs["new"]):
+        if n not in mapping and o not in used:
+            mapping[n] = o
+            used.add(o)
+    return mapping
+
+# === Registry ===
+class IDRegistry:
+    """
+    IDs issued per sheet, persisted as JSON next to the annotation output:
+      {sheet: {level: {"ids": {ID: {"label", "panels"}}, "next": counter}}}
+    "next" is the next segment number, or per label the next event occurrence;
+    counters only grow, so an ID of a deleted span is never reissued.
+
+    stabilize() matches the freshly assigned run-length IDs to the registered
+    spans (see match_spans): matched spans keep their ID, only genuinely new
+    spans get new ones. Re-annotating one row then changes only the IDs (and
+    the KG nodes, layouts and results) that involve that row.
+    """
+
+    def __init__(self, data=None):
+        self.data = data or {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+
+    def _mint(self, level, state, label):
+        if level == "event":
+            n = state["next"].get(label, 1)
+            state["next"][label] = n + 1
+            return f"{label}_{n}"
+        n = state["next"]
+        state["next"] = n + 1
+        return f"seg{n:03d}"
+
+    def stabilize(self, df, sheet="Sheet1"):
+        """
+        df with Plot_1_ID / Plot_2_ID from AssignEventIDs.assign_ids ->
+        (df with registered IDs, {level: {"kept", "changed", "new", "removed"}}).
+        The registry is updated in place; save() it afterwards.
+        """
+        df = df.copy()
+        book = self.data.setdefault(sheet, {})
+        diff = {}
+        for level, (_, id_col) in LEVELS.items():
+            state = book.setdefault(level, {"ids": {}, "next": {} if level == "event" else 1})
+            old, new = state["ids"], spans(df, level)
+            matched = match_spans(old, new, SAME_LABEL[level])
+
+            final, changed, minted = {}, [], []
+            for fresh, span in new.items():  # reading order, so new IDs count up along the book
+                if fresh in matched:
+                    final[fresh] = matched[fresh]
+                    if old[matched[fresh]] != span:
+                        changed.append(matched[fresh])
+                else:
+                    final[fresh] = self._mint(level, state, span["label"])
+                    minted.append(final[fresh])
+            kept = set(final.values())
+            diff[level] = {"kept": len(kept) - len(minted) - len(changed), "changed": changed,
+                           "new": minted, "removed": [i for i in old if i not in kept]}
+
+            df[id_col] = df[id_col].astype(str).map(final)
+            state["ids"] = {final[fresh]: span for fresh, span in new.items()}
+        return df, diff
@@ -1,13 +1,19 @@
 import os
 import json
+import pandas as pd
 import networkx as nx
 from networkx.readwrite import json_graph
 import matplotlib.pyplot as plt
+from CharacterIndex import attach_character_index
+from TemporalIndex import attach_temporal_index
+from TextIndex import build_text_index, text_index_path
+from BuildEventKG_withID_Temporal import build_event_kg
 
 # === CONFIG ===
 PANEL_KG_DIR = "Data/KGs_Book_0/panel_graphs"
 SEQUENCE_KG_FILE = "Data/KGs_Book_0/sequence_kg/sequence_kg.json"
 EVENT_KG_FILE = "Data/KGs_Book_0/event_kg/event_kg.json"
+ANNOTATION_FILE = "Data/Annotation_Book_0/Story_0_with_IDs.xlsx"  # fallback source for the event KG
 OUTPUT_PATH = "Data/KGs_Book_0/integrated_kg.json"
 VIS_PATH = "Data/KGs_Book_0/integrated_kg.png"
 
@@ -16,25 +22,37 @@ def load_graph_json(path):
     with open(path, "r", encoding="utf-8") as f:
         return json_graph.node_link_graph(json.load(f))
 
-# Merge panel-level graphs
-panel_graphs = {}
-for fname in os.listdir(PANEL_KG_DIR):
-    if fname.endswith(".json"):
-        panel_id = fname.replace(".json", "")
-        g = load_graph_json(os.path.join(PANEL_KG_DIR, fname))
-        panel_graphs[panel_id] = g
-
-# Load sequence and event KGs
-G_seq = load_graph_json(SEQUENCE_KG_FILE)
-G_event = load_graph_json(EVENT_KG_FILE)
-
-# === MERGE INTO UNIFIED GRAPH ===
-G_all = nx.DiGraph()
-G_all.update(G_seq)
-G_all.update(G_event)
+def load_event_graph(path=EVENT_KG_FILE, annotation_file=ANNOTATION_FILE):
+    """
+    The saved event KG, or (when it was never exported) one built in memory
+    from the annotation sheet.
+    """
+    if os.path.exists(path) or not os.path.exists(annotation_file):
+        return load_graph_json(path)
+    return build_event_kg(pd.read_excel(annotation_file))
+
+def load_panel_graphs(panel_kg_dir):
+    panel_graphs = {}
+    for fname in os.listdir(panel_kg_dir):
+        if fname.endswith(".json"):
+            panel_id = fname.replace(".json", "")
+            g = load_graph_json(os.path.join(panel_kg_dir, fname))
+            panel_graphs[panel_id] = g
+    return panel_graphs
 
 # === Add panel-level content and cross-level edges ===
-for panel_id, G_panel in panel_graphs.items():
+def integrate_panel_graph(G_all, G_event, panel_id, G_panel, char_index=None):
+    """
+    Upsert one panel graph into the unified graph.
+    Re-upserting a panel replaces its character links and refreshes the
+    character index entry for that panel.
+    """
+    panel_visual = f"Panel_visual_{panel_id}"
+    if panel_visual in G_all:
+        stale = [(u, v) for u, v, d in G_all.out_edges(panel_visual, data=True)
+                 if d.get("relation") == "has_character"]
+        G_all.remove_edges_from(stale)
+
     G_all.update(G_panel)
 
     # Find Plot_2_ID from panel graph (we stored it as 'event_segment' node)
@@ -44,20 +62,29 @@ for panel_id, G_panel in panel_graphs.items():
         G_all.add_edge(panel_id, plot_2_id, relation="instantiates")
 
         # Link segment to parent event and macro (if available)
-        for u, v, d in G_event.edges(data=True):
-            if u == plot_2_id and d.get("relation") == "subevent_of":
-                plot_1_id = v
-                G_all.add_edge(plot_2_id, plot_1_id, relation="subevent_of")
+        if plot_2_id in G_event:
+            for _, plot_1_id, d in G_event.out_edges(plot_2_id, data=True):
+                if d.get("relation") == "subevent_of":
+                    G_all.add_edge(plot_2_id, plot_1_id, relation="subevent_of")
+
+                    for _, vv, dd in G_event.out_edges(plot_1_id, data=True):
+                        if dd.get("relation") == "subevent_of":
+                            G_all.add_edge(plot_1_id, vv, relation="subevent_of")
 
-                for uu, vv, dd in G_event.edges(data=True):
-                    if uu == plot_1_id and dd.get("relation") == "subevent_of":
-                        G_all.add_edge(plot_1_id, vv, relation="subevent_of")
+    if char_index is not None:
+        char_index.upsert_panel(G_all, panel_id)
 
-# === SAVE INTEGRATED GRAPH ===
-with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-    json.dump(json_graph.node_link_data(G_all), f, indent=2, ensure_ascii=False)
+# === MERGE INTO UNIFIED GRAPH ===
+def integrate_graphs(panel_graphs, G_seq, G_event):
+    G_all = nx.DiGraph()
+    G_all.update(G_seq)
+    G_all.update(G_event)
 
-print(f"✅ Unified graph saved to {OUTPUT_PATH}")
+    char_index = attach_character_index(G_all)
+    for panel_id, G_panel in panel_graphs.items():
+        integrate_panel_graph(G_all, G_event, panel_id, G_panel, char_index)
+    attach_temporal_index(G_all)
+    return G_all
 
 # === VISUALIZE (basic) ===
 def visualize_graph(G, path, title="Integrated KG"):
@@ -83,8 +110,26 @@ def visualize_graph(G, path, title="Integrated KG"):
     plt.savefig(path, dpi=300)
     plt.close()
 
-visualize_graph(G_all, VIS_PATH)
-print(f"🖼️  Visualization saved to {VIS_PATH}")
+if __name__ == "__main__":
+    panel_graphs = load_panel_graphs(PANEL_KG_DIR)
+
+    # Load sequence and event KGs
+    G_seq = load_graph_json(SEQUENCE_KG_FILE)
+    G_event = load_event_graph()
+
+    G_all = integrate_graphs(panel_graphs, G_seq, G_event)
+
+    # === SAVE INTEGRATED GRAPH ===
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(json_graph.node_link_data(G_all), f, indent=2, ensure_ascii=False)
+
+    print(f"✅ Unified graph saved to {OUTPUT_PATH}")
+
+    build_text_index(G_all).save(text_index_path(OUTPUT_PATH))
+    print(f"✅ Text index saved to {text_index_path(OUTPUT_PATH)}")
+
+    visualize_graph(G_all, VIS_PATH)
+    print(f"🖼️  Visualization saved to {VIS_PATH}")
 
 # === Reasoning Examples (to implement) ===
 # def get_all_actions_in_event(G, event_id):
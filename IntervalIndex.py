@@ -0,0 +1,232 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+from ReasoningQueries_updated_2 import get_predecessors_by_relation, natural_key
+
+# === CONFIG ===
+LEVELS = {"event_segment": "Plot_2_ID", "event": "Plot_1_ID", "macro_event": "Plot_0"}
+GRAPH_KEY = "interval_index"
+# Node attributes carried by every hierarchy node
+START, END, PANELS = "reading_start", "reading_end", "reading_panels"
+
+def page_of(panel_id):
+    """
+    "0_7_2" -> "0_7" (book_page of a panel ID).
+    """
+    return str(panel_id).rsplit("_", 1)[0]
+
+# === Static interval tree ===
+class IntervalTree:
+    """
+    Intervals sorted by (start, end) over an implicit segment tree holding the
+    max and min end of every block. A query picks its start range with
+    bisect and descends only into blocks whose ends can still match, so it
+    costs O(log n) per reported interval (O(log n) if none match).
+    """
+
+    def __init__(self, nodes, start, end):
+        order = np.lexsort((np.asarray(end), np.asarray(start))) if len(nodes) else np.empty(0, dtype=int)
+        self.nodes = [nodes[i] for i in order]
+        self.start = [int(start[i]) for i in order]
+        self.end = [int(end[i]) for i in order]
+
+        size = 1
+        while size < max(len(self.nodes), 1):
+            size *= 2
+        self.size = size
+        self.max_end = np.full(2 * size, -np.inf)
+        self.min_end = np.full(2 * size, np.inf)
+        self.max_end[size:size + len(self.end)] = self.end
+        self.min_end[size:size + len(self.end)] = self.end
+        width = size
+        while width > 1:  # one vectorized pass per tree level: nodes [width/2, width)
+            width //= 2
+            self.max_end[width:2 * width] = np.maximum(self.max_end[2 * width:4 * width:2],
+                                                       self.max_end[2 * width + 1:4 * width:2])
+            self.min_end[width:2 * width] = np.minimum(self.min_end[2 * width:4 * width:2],
+                                                       self.min_end[2 * width + 1:4 * width:2])
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _report(self, lo, hi, end_at_least=-np.inf, end_at_most=np.inf):
+        """
+        Positions i in [lo, hi) with end_at_least <= end[i] <= end_at_most.
+        """
+        found, stack = [], [(1, 0, self.size)]
+        while stack:
+            node, left, right = stack.pop()
+            if right <= lo or left >= hi or self.max_end[node] < end_at_least or self.min_end[node] > end_at_most:
+                continue
+            if node >= self.size:
+                found.append(left)
+                continue
+            mid = (left + right) // 2
+            stack.append((2 * node + 1, mid, right))
+            stack.append((2 * node, left, mid))
+        return found
+
+    def overlapping(self, start, end):
+        return [self.nodes[i] for i in self._report(0, bisect_right(self.start, end), end_at_least=start)]
+
+    def containing(self, start, end):
+        return [self.nodes[i] for i in self._report(0, bisect_right(self.start, start), end_at_least=end)]
+
+    def within(self, start, end):
+        lo, hi = bisect_left(self.start, start), bisect_right(self.start, end)
+        return [self.nodes[i] for i in self._report(lo, hi, end_at_most=end)]
+
+    def interleaved(self):
+        """
+        Pairs (a, b) that overlap without either containing the other:
+        a starts first and b ends after a does.
+        """
+        pairs = []
+        for i, (s, e) in enumerate(zip(self.start, self.end)):
+            hi = bisect_right(self.start, e)
+            for j in self._report(i + 1, hi, end_at_least=e + 1):
+                if self.start[j] > s:
+                    pairs.append((self.nodes[i], self.nodes[j]))
+        return pairs
+
+# === Reading-interval index ===
+class IntervalIndex:
+    """
+    Reading-rank interval [start, end] of every segment, event and
+    macro-event, plus the panel count inside it (an interval is contiguous
+    when panels == end - start + 1) and the rank range of each page.
+
+    Stored as plain JSON in G.graph["interval_index"]:
+      levels: level -> {"nodes": [...], "start": [...], "end": [...], "panels": [...]}
+      pages:  "book_page" -> [start, end]
+    The trees are rebuilt from it on first use.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._trees = {}
+        self._lookup = None
+
+    def tree(self, level):
+        if level not in self._trees:
+            entry = self.data["levels"].get(level, {"nodes": [], "start": [], "end": []})
+            self._trees[level] = IntervalTree(entry["nodes"], entry["start"], entry["end"])
+        return self._trees[level]
+
+    def interval(self, node):
+        """
+        (start, end, panels) of a hierarchy node, or None.
+        """
+        if self._lookup is None:
+            self._lookup = {n: (s, e, p) for entry in self.data["levels"].values()
+                            for n, s, e, p in zip(entry["nodes"], entry["start"], entry["end"], entry["panels"])}
+        return self._lookup.get(node)
+
+    def page_range(self, page):
+        return tuple(self.data["pages"][str(page)])
+
+    def at(self, rank, level="event_segment"):
+        """
+        Nodes whose interval contains the reading rank.
+        """
+        return self.tree(level).overlapping(rank, rank)
+
+    def overlapping(self, start, end, level="event_segment"):
+        return self.tree(level).overlapping(start, end)
+
+    def containing(self, start, end, level="event_segment"):
+        return self.tree(level).containing(start, end)
+
+    def within(self, start, end, level="event_segment"):
+        return self.tree(level).within(start, end)
+
+    def on_page(self, page, level="event_segment"):
+        """
+        Nodes with at least one panel position on the page's rank range.
+        """
+        return self.overlapping(*self.page_range(page), level=level)
+
+    def spanning_page(self, page, level="event_segment"):
+        """
+        Nodes whose interval covers the whole page.
+        """
+        return self.containing(*self.page_range(page), level=level)
+
+    def interleaved(self, level="event"):
+        return self.tree(level).interleaved()
+
+    def fragmented(self, level="event"):
+        """
+        Nodes whose panels do not form one contiguous reading range.
+        """
+        entry = self.data["levels"].get(level, {"nodes": []})
+        return [n for n, s, e, p in zip(entry["nodes"], entry["start"], entry["end"], entry["panels"])
+                if p < e - s + 1]
+
+
+# === Builders ===
+def _index_data(panel_ids, level_ids):
+    """
+    panel_ids in reading order; level_ids: level -> node ID per panel.
+    """
+    frame = pd.DataFrame({"rank": np.arange(len(panel_ids)), "page": [page_of(p) for p in panel_ids],
+                          **{level: ids for level, ids in level_ids.items()}})
+    levels = {}
+    for level in level_ids:
+        spans = frame.dropna(subset=[level]).groupby(level, sort=False)["rank"].agg(["min", "max", "count"])
+        levels[level] = {"nodes": [str(n) for n in spans.index], "start": spans["min"].astype(int).tolist(),
+                         "end": spans["max"].astype(int).tolist(), "panels": spans["count"].astype(int).tolist()}
+    pages = frame.groupby("page", sort=False)["rank"].agg(["min", "max"])
+    return {"levels": levels,
+            "pages": {p: [int(lo), int(hi)] for p, lo, hi in zip(pages.index, pages["min"], pages["max"])}}
+
+def build_interval_index_from_frame(df):
+    """
+    From an annotation frame in reading order (see BuildEventKG_withID_Temporal.py).
+    """
+    df = df.dropna(subset=["Index"])
+    return IntervalIndex(_index_data(df["Index"].astype(str).tolist(),
+                                     {level: df[col].astype(str).tolist() for level, col in LEVELS.items()}))
+
+def build_interval_index(G):
+    """
+    From a KG: panels in temporal-index reading order (natural ID order
+    without one), each mapped to its segment, event and macro-event.
+    """
+    ranks = G.graph.get("temporal_index", {}).get("rank", {}).get("reading", {})
+    panels = sorted((n for n, d in G.nodes(data=True) if d.get("type") == "panel"),
+                    key=lambda n: (n not in ranks, ranks.get(n, 0), natural_key(n)))
+    parent = {}
+    for level, child_level, relation in (("event_segment", "panel", "instantiates"),
+                                         ("event", "event_segment", "subevent_of"),
+                                         ("macro_event", "event", "subevent_of")):
+        for n, d in G.nodes(data=True):
+            if d.get("type") == level:
+                for child in get_predecessors_by_relation(G, n, relation, child_level):
+                    parent.setdefault((child_level, child), n)
+    level_ids = {}
+    below = dict(zip(panels, panels))
+    for level, child_level in (("event_segment", "panel"), ("event", "event_segment"), ("macro_event", "event")):
+        below = {p: parent.get((child_level, node)) for p, node in below.items()}
+        level_ids[level] = [below[p] for p in panels]
+    return IntervalIndex(_index_data(panels, level_ids))
+
+def attach_interval_index(G, index=None):
+    """
+    Store the index in G.graph and the interval on every hierarchy node.
+    """
+    if index is None:
+        index = build_interval_index(G)
+    G.graph[GRAPH_KEY] = index.data
+    for entry in index.data["levels"].values():
+        for n, s, e, p in zip(entry["nodes"], entry["start"], entry["end"], entry["panels"]):
+            if n in G:
+                G.nodes[n].update({START: s, END: e, PANELS: p})
+    return index
+
+def get_interval_index(G):
+    if GRAPH_KEY in G.graph:
+        return IntervalIndex(G.graph[GRAPH_KEY])
+    return attach_interval_index(G)
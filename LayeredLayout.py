@@ -0,0 +1,213 @@
+import numpy as np
+
+from OrderingMetrics import batch_inversions
+
+# === CONFIG ===
+LAYERS = {"macro_event": 0, "event": 1, "event_segment": 2, "panel": 3}
+HIERARCHY_RELATIONS = {"subevent_of", "instantiates"}  # child -> parent
+SWEEPS = 4
+SPACING_X = 5
+SPACING_Y = 4
+
+# === Structure ===
+def _hierarchy(G, relation_key):
+    """
+    Node list, layer per node and (child, parent) index arrays of the
+    hierarchy edges that go exactly one layer up.
+    """
+    nodes = list(G.nodes)
+    index = {n: i for i, n in enumerate(nodes)}
+    other = max(LAYERS.values()) + 1
+    layer = np.fromiter((LAYERS.get(d.get("type"), other) for _, d in G.nodes(data=True)),
+                        dtype=np.int64, count=len(nodes))
+    pairs = [(index[u], index[v]) for u, v, d in G.edges(data=True)
+             if d.get(relation_key) in HIERARCHY_RELATIONS]
+    child, parent = (np.array(p, dtype=np.int64).reshape(-1) for p in zip(*pairs)) if pairs \
+        else (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    keep = layer[parent] == layer[child] - 1
+    return nodes, layer, child[keep], parent[keep]
+
+def _sort_layer(members, key, position):
+    """
+    Reorder one layer in place: by key, ties (and missing keys) by current position.
+    """
+    key = np.where(np.isnan(key), position[members], key)
+    order = np.lexsort((position[members], key))
+    position[members[order]] = np.arange(len(members))
+
+def _barycenters(members, src, dst, position, width):
+    """
+    Mean position of each member's neighbours (dst of its src edges),
+    rescaled to the member's layer width; NaN for members without neighbours.
+    """
+    n = len(position)
+    total = np.bincount(src, weights=position[dst] * width[src] / width[dst], minlength=n)[members]
+    count = np.bincount(src, minlength=n)[members]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+def count_crossings(layer, child, parent, position):
+    """
+    Crossings between consecutive layers: per layer pair, edges sorted by
+    (parent position, child position) and the inversions of the child positions.
+    """
+    sequences = []
+    for l in np.unique(layer[parent]):
+        edges = layer[parent] == l
+        order = np.lexsort((position[child[edges]], position[parent[edges]]))
+        sequences.append(position[child[edges]][order])
+    return int(batch_inversions(sequences).sum()) if sequences else 0
+
+def order_layers(layer, child, parent, sweeps=SWEEPS):
+    """
+    Within-layer positions from alternating barycenter sweeps: downwards each
+    layer is sorted by the mean position of its parents, upwards by that of
+    its children, always against the freshly sorted neighbour layer. The
+    ordering with the fewest crossings wins. A sweep is one bincount and one
+    sort per layer: O(n log n).
+    """
+    n = len(layer)
+    levels = sorted(np.unique(layer))
+    members = {l: np.flatnonzero(layer == l) for l in levels}
+    position = np.zeros(n)
+    for l in levels:  # initial order: insertion order within each layer
+        position[members[l]] = np.arange(len(members[l]))
+    width = np.bincount(layer)[layer].astype(float)
+
+    best, best_crossings = position.copy(), count_crossings(layer, child, parent, position)
+    for sweep in range(sweeps):
+        down = sweep % 2 == 0
+        for l in (levels[1:] if down else levels[-2::-1]):
+            src, dst = (child, parent) if down else (parent, child)
+            _sort_layer(members[l], _barycenters(members[l], src, dst, position, width), position)
+        crossings = count_crossings(layer, child, parent, position)
+        if crossings < best_crossings:
+            best, best_crossings = position.copy(), crossings
+    return best, best_crossings
+
+# === Coordinates ===
+def assign_x(layer, child, parent, position, spacing_x=SPACING_X):
+    """
+    Bottom-up: each node is centred over its children, nodes without children
+    follow their left neighbour, and a cumulative max keeps >= spacing_x
+    between neighbours (so a layer never overlaps itself). Layers start at 0.
+    """
+    n = len(layer)
+    x = np.zeros(n)
+    for l in sorted(np.unique(layer), reverse=True):
+        members = np.flatnonzero(layer == l)
+        members = members[np.argsort(position[members], kind="stable")]
+        edges = layer[parent] == l
+        total = np.bincount(parent[edges], weights=x[child[edges]], minlength=n)[members]
+        count = np.bincount(parent[edges], minlength=n)[members]
+        desired = np.where(count > 0, total / np.maximum(count, 1), -np.inf)
+        steps = np.arange(len(members)) * spacing_x
+        x[members] = np.maximum.accumulate(np.maximum(desired - steps, 0.0)) + steps
+    return x
+
+def _first_parents(layer, child, parent, position):
+    """
+    Leftmost parent of every node, -1 for roots.
+    """
+    first_parent = np.full(len(layer), -1)
+    order = np.lexsort((position[parent], child))
+    first = np.r_[True, child[order][1:] != child[order][:-1]] if len(order) else np.empty(0, dtype=bool)
+    first_parent[child[order][first]] = parent[order][first]
+    return first_parent
+
+def wrap_rows(layer, child, parent, position, x, max_width):
+    """
+    Row index per node and x shifted to its row start.
+
+    Rows are packed left to right with "units": the highest subtrees that
+    are at most max_width wide (a whole macro event when it fits, else its
+    events, segments, ...). A node too wide to be a unit sits in the first
+    row its children reach, centred over the children in that row.
+    """
+    n = len(layer)
+    levels = sorted(np.unique(layer))
+    first_parent = _first_parents(layer, child, parent, position)
+
+    # Subtree extents, bottom-up
+    lo, hi = x.copy(), x.copy()
+    for l in levels[::-1]:
+        edges = layer[child] == l
+        np.minimum.at(lo, parent[edges], lo[child[edges]])
+        np.maximum.at(hi, parent[edges], hi[child[edges]])
+    wide = hi - lo > max_width
+
+    # Unit root of every node that fits, top-down
+    unit = np.full(n, -1)
+    for l in levels:
+        members = np.flatnonzero((layer == l) & ~wide)
+        fp = first_parent[members]
+        is_root = (fp < 0) | wide[np.maximum(fp, 0)]
+        unit[members] = np.where(is_root, members, unit[np.maximum(fp, 0)])
+
+    roots = np.flatnonzero(unit == np.arange(n))
+    row_of, shift = np.zeros(n, dtype=np.int64), np.zeros(n)
+    row, row_start = 0, None
+    for r in roots[np.lexsort((layer[roots], lo[roots]))]:
+        if row_start is None:
+            row_start = lo[r]
+        elif hi[r] - row_start > max_width:
+            row, row_start = row + 1, lo[r]
+        row_of[r], shift[r] = row, row_start
+    fits = unit >= 0
+    row_of[fits], shift[fits] = row_of[unit[fits]], shift[unit[fits]]
+    x = x - shift
+
+    # Wide nodes, bottom-up: first row of their children, centred over those
+    for l in levels[::-1]:
+        members = np.flatnonzero((layer == l) & wide)
+        if not len(members):
+            continue
+        edges = np.isin(parent, members)
+        first_row = np.full(n, np.iinfo(np.int64).max)
+        np.minimum.at(first_row, parent[edges], row_of[child[edges]])
+        in_row = edges & (row_of[child] == first_row[parent])
+        total = np.bincount(parent[in_row], weights=x[child[in_row]], minlength=n)
+        count = np.bincount(parent[in_row], minlength=n)
+        row_of[members] = np.where(count[members] > 0, first_row[members], 0)
+        x[members] = np.where(count[members] > 0, total[members] / np.maximum(count[members], 1), 0.0)
+    return row_of, x
+
+# === Public API ===
+def layout_rows(G, spacing_x=SPACING_X, spacing_y=SPACING_Y, sweeps=SWEEPS, max_row_nodes=None,
+                relation_key="relation"):
+    """
+    Layered positions for an event KG (macro_event / event / event_segment /
+    panel top-down, other types below) and the node lists of each wrapped row.
+    With max_row_nodes, rows are at most that many panel slots wide and are
+    stacked downwards; draw them together or one image per row.
+    """
+    nodes, layer, child, parent = _hierarchy(G, relation_key)
+    if not nodes:
+        return {}, []
+    position, _ = order_layers(layer, child, parent, sweeps)
+    x = assign_x(layer, child, parent, position, spacing_x)
+    if max_row_nodes:
+        row, x = wrap_rows(layer, child, parent, position, x, max_row_nodes * spacing_x)
+    else:
+        row = np.zeros(len(nodes), dtype=np.int64)
+    depth = int(layer.max()) + 2  # layers per row plus one blank layer between rows
+    y = -(layer + row * depth) * spacing_y
+
+    pos = {n: (float(x[i]), float(y[i])) for i, n in enumerate(nodes)}
+    rows = [[] for _ in range(int(row.max()) + 1)]
+    for i in np.lexsort((x, row)):
+        rows[row[i]].append(nodes[i])
+    return pos, rows
+
+def layered_layout(G, spacing_x=SPACING_X, spacing_y=SPACING_Y, sweeps=SWEEPS, max_row_nodes=None,
+                   relation_key="relation"):
+    return layout_rows(G, spacing_x, spacing_y, sweeps, max_row_nodes, relation_key)[0]
+
+def figure_size(pos, inches_per_unit=0.25, min_size=(8, 6), max_size=(200, 200)):
+    """
+    matplotlib figsize that grows with the layout extent (capped).
+    """
+    xs, ys = zip(*pos.values()) if pos else ((0,), (0,))
+    width = (max(xs) - min(xs)) * inches_per_unit + 2
+    height = (max(ys) - min(ys)) * inches_per_unit + 2
+    return (min(max(width, min_size[0]), max_size[0]), min(max(height, min_size[1]), max_size[1]))
@@ -0,0 +1,239 @@
+import re
+import csv
+import json
+import time
+import argparse
+import unicodedata
+from pathlib import Path
+from functools import lru_cache
+from collections import Counter
+
+from CharacterIndex import GRAPH_KEY, HIERARCHY_LEVELS
+from RunReasoningTasks import kg_path
+
+# === CONFIG ===
+MAPPING_SUFFIX = "_mapping.csv"
+
+def mapping_path(normalized_kg_path):
+    """
+    integrated_kg_normalized.json -> integrated_kg_normalized_mapping.csv
+    """
+    p = Path(normalized_kg_path)
+    return str(p.with_name(p.stem + MAPPING_SUFFIX))
+
+# === Canonical forms (memoized: labels repeat a lot across panels) ===
+_SPACES = re.compile(r"\s+")
+_VERB_SEPARATORS = re.compile(r"[\s\-]+")
+
+@lru_cache(maxsize=None)
+def canonical_text(text):
+    """
+    Unicode-normalized, whitespace-trimmed and collapsed text.
+    """
+    return _SPACES.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+@lru_cache(maxsize=None)
+def canonical_verb(verb):
+    """
+    "Look at" / "look-at" / " look_at " -> "look_at"
+    """
+    return _VERB_SEPARATORS.sub("_", canonical_text(verb).lower()).strip("_")
+
+@lru_cache(maxsize=None)
+def character_key(name):
+    return canonical_text(name).casefold()
+
+# === Pass 1: character lookup table ===
+def build_character_table(nodes, links):
+    """
+    casefold key -> canonical surface form: the spelling used in the most
+    panels (has_character links), ties broken by first appearance.
+    """
+    types = {rec["id"]: rec.get("type") for rec in nodes}
+    counts = Counter()
+    first_seen = {}
+    for rec in nodes:
+        if rec.get("type") == "character":
+            surface = canonical_text(rec.get("label") or rec["id"])
+            counts[surface] += 0
+            first_seen.setdefault(surface, len(first_seen))
+    for link in links:
+        if link.get("relation") == "has_character" and types.get(link["target"]) == "character":
+            counts[canonical_text(link["target"])] += 1
+
+    table = {}
+    for surface in sorted(counts, key=lambda s: (-counts[s], first_seen.get(s, len(first_seen)))):
+        table.setdefault(character_key(surface), surface)
+    return table
+
+def load_character_table(path):
+    """
+    casefold key -> canonical name from a mapping report (its character rows),
+    the same lookup the KG was normalized with; {} without a report.
+    """
+    table = {}
+    if not Path(path).exists():
+        return table
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["Kind"] == "character":
+                table[character_key(row["Original"])] = row["Canonical"]
+                table[character_key(row["Canonical"])] = row["Canonical"]
+    return table
+
+def canonical_labels(labels, kind, char_table=None):
+    """
+    Labels outside the KG (e.g. ground-truth items) in the KG's canonical
+    forms: kind is "action", "text" or "character" as in the mapping report.
+    """
+    if kind == "action":
+        return [canonical_verb(label) for label in labels]
+    if kind == "text":
+        return [canonical_text(label) for label in labels]
+    char_table = char_table or {}
+    return [char_table.get(character_key(label), canonical_text(label)) for label in labels]
+
+# === Pass 2: rewrite records ===
+class Normalizer:
+    """
+    Passes node-link records through the canonical forms and keeps the
+    (kind, original, canonical) -> count mapping for the report.
+    """
+
+    def __init__(self, char_table):
+        self.char_table = char_table
+        self.id_map = {}
+        self.mapping = Counter()
+
+    def _record(self, kind, original, canonical):
+        if original != canonical:
+            self.mapping[(kind, original, canonical)] += 1
+        return canonical
+
+    def canonical_character(self, name):
+        return self.char_table.get(character_key(name), name)
+
+    def character(self, name):
+        return self._record("character", name, self.canonical_character(name))
+
+    def node(self, rec):
+        rec = dict(rec)
+        node_id, node_type, label = rec["id"], rec.get("type"), rec.get("label")
+        new_id = node_id
+
+        if node_type == "action" and isinstance(label, str):
+            rec["label"] = self._record("action", label, canonical_verb(label))
+        elif node_type == "text" and isinstance(label, str):
+            rec["label"] = self._record("text", label, canonical_text(label))
+        elif node_type in ("character", None) and character_key(node_id) in self.char_table:
+            # Character nodes are keyed by name; untyped action subjects/targets share those IDs
+            new_id = self.character(node_id)
+            if node_type == "character":
+                rec["label"] = new_id
+        elif node_type == "visual" and node_id.startswith("Visual_") \
+                and character_key(node_id[len("Visual_"):]) in self.char_table:
+            name = self.character(node_id[len("Visual_"):])
+            new_id, rec["label"] = f"Visual_{name}", f"Visual of {name}"
+
+        if new_id != node_id:
+            self.id_map[node_id] = new_id
+            rec["id"] = new_id
+        return rec
+
+    def nodes(self, records):
+        seen = set()
+        for rec in records:
+            rec = self.node(rec)
+            if rec["id"] not in seen:  # merged spellings keep the first record
+                seen.add(rec["id"])
+                yield rec
+
+    def links(self, records):
+        """
+        Remapped links, one per (source, target) as in a DiGraph (last attributes win).
+        """
+        merged = {}
+        for link in records:
+            link = dict(link)
+            link["source"] = self.id_map.get(link["source"], link["source"])
+            link["target"] = self.id_map.get(link["target"], link["target"])
+            merged[(link["source"], link["target"])] = link
+        return list(merged.values())
+
+    def character_index(self, data):
+        """
+        Remap the KG's character index (see CharacterIndex.py) to canonical names.
+        """
+        panels = {}
+        for panel_id, entry in data.get("panels", {}).items():
+            entry = dict(entry)
+            entry["characters"] = list(dict.fromkeys(self.canonical_character(c) for c in entry["characters"]))
+            panels[panel_id] = entry
+        postings = {}
+        for level in HIERARCHY_LEVELS:
+            merged = {}
+            for char, nodes in data.get("postings", {}).get(level, {}).items():
+                target = merged.setdefault(self.canonical_character(char), {})
+                for node, count in nodes.items():
+                    target[node] = target.get(node, 0) + count
+            postings[level] = merged
+        return {"panels": panels, "postings": postings}
+
+    def report_rows(self):
+        return [{"Kind": kind, "Original": original, "Canonical": canonical, "Count": count}
+                for (kind, original, canonical), count in sorted(self.mapping.items())]
+
+
+def normalize_node_link(data):
+    """
+    Normalized copy of node-link KG data and the Normalizer holding the mapping.
+    """
+    links_key = "links" if "links" in data else "edges"
+    nodes, links = data["nodes"], data.get(links_key, [])
+    normalizer = Normalizer(build_character_table(nodes, links))
+
+    out = {k: v for k, v in data.items() if k not in ("nodes", links_key, "graph")}
+    out["graph"] = dict(data.get("graph", {}))
+    out["nodes"] = list(normalizer.nodes(nodes))
+    out[links_key] = normalizer.links(links)
+    if GRAPH_KEY in out["graph"]:
+        out["graph"][GRAPH_KEY] = normalizer.character_index(out["graph"][GRAPH_KEY])
+    return out, normalizer
+
+def normalize_kg_file(src, dst):
+    with open(src, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    out, normalizer = normalize_node_link(data)
+    with open(dst, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2, ensure_ascii=False)
+
+    rows = normalizer.report_rows()
+    with open(mapping_path(dst), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["Kind", "Original", "Canonical", "Count"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return data, out, rows
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write integrated_kg_normalized.json with canonical labels.")
+    parser.add_argument("--book", default="1")
+    parser.add_argument("--src", default=None, help="default: the book's integrated_kg.json")
+    parser.add_argument("--dst", default=None, help="default: the book's integrated_kg_normalized.json")
+    args = parser.parse_args()
+
+    src = args.src or kg_path(args.book, "raw")
+    dst = args.dst or kg_path(args.book, "normalized")
+    start = time.perf_counter()
+    data, out, rows = normalize_kg_file(src, dst)
+    links_key = "links" if "links" in data else "edges"
+
+    by_kind = Counter()
+    for row in rows:
+        by_kind[row["Kind"]] += 1
+    print(f"✅ Normalized KG saved to {dst} ({time.perf_counter() - start:.2f}s)")
+    print(f"   nodes {len(data['nodes'])} → {len(out['nodes'])}, "
+          f"links {len(data[links_key])} → {len(out[links_key])}")
+    for kind in ("action", "character", "text"):
+        print(f"   {kind:<9}: {by_kind[kind]} label variant(s) mapped")
+    print(f"✅ Mapping report saved to {mapping_path(dst)}")
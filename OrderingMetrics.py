@@ -0,0 +1,119 @@
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+# === CONFIG ===
+ORDERING_METRICS = ["Kendall_Tau", "LCS_Ratio", "Positional"]
+
+# === O(n log n) primitives ===
+def _dense_ranks(values):
+    """
+    Ranks 0..n-1; equal values keep their order (and so never count as inverted).
+    """
+    return np.argsort(np.argsort(values, kind="stable"), kind="stable").astype(np.int64)
+
+def batch_inversions(sequences):
+    """
+    Inversion count of every sequence in one bottom-up merge-sort pass.
+
+    The sequences are concatenated with their values ranked inside
+    consecutive, disjoint ranges, so pairs from different sequences are never
+    inverted and every inversion can be charged to one sequence. Every pair
+    i < j is split at exactly one level: the one where i falls in the left and
+    j in the right half of the same block of 2 * width. Walking the items once
+    in decreasing value order (fixed for all levels), a right-half item is
+    inverted with the left-half items of its block seen before it, which is a
+    grouped running count: O(n) per level with no re-sorting, O(n log n) for
+    the whole batch (plus one initial ranking sort).
+    """
+    lengths = np.fromiter((len(s) for s in sequences), dtype=np.int64, count=len(sequences))
+    n = int(lengths.sum())
+    counts = np.zeros(len(sequences), dtype=np.int64)
+    if n < 2:
+        return counts
+    seq_of_item = np.repeat(np.arange(len(sequences)), lengths)
+    values = _dense_ranks(np.concatenate([np.asarray(s, dtype=float) for s in sequences if len(s)]))
+    a = _dense_ranks(seq_of_item * n + values)  # rank ranges follow sequence order
+
+    desc = np.empty(n, dtype=np.int64)
+    desc[n - 1 - a] = np.arange(n)              # positions by decreasing value (a is a permutation)
+    seq_desc = seq_of_item[desc]
+    width = 1
+    while width < n:
+        left = (desc // width) % 2 == 0
+        seen_left = pd.Series(left.astype(np.int64)).groupby(desc // (2 * width), sort=False).cumsum()
+        counts += np.bincount(seq_desc[~left], weights=seen_left.to_numpy()[~left],
+                              minlength=len(sequences)).astype(np.int64)
+        width *= 2
+    return counts
+
+def count_inversions(seq):
+    """
+    Number of pairs i < j with seq[i] > seq[j].
+    """
+    return int(batch_inversions([seq])[0])
+
+def longest_increasing_subsequence(seq):
+    """
+    Length of the longest strictly increasing subsequence (patience sorting).
+    """
+    tails = []
+    for x in seq:
+        i = bisect_left(tails, x)
+        if i == len(tails):
+            tails.append(x)
+        else:
+            tails[i] = x
+    return len(tails)
+
+# === Per-row metrics ===
+def _mapped_positions(gt, pred):
+    gt = list(dict.fromkeys(gt))
+    pred = list(dict.fromkeys(pred))
+    position = {item: i for i, item in enumerate(gt)}
+    return gt, pred, [position[item] for item in pred if item in position]
+
+def _metrics(gt, pred, mapped, inversions):
+    common = len(mapped)
+    pairs = common * (common - 1) // 2
+    lcs = longest_increasing_subsequence(mapped)
+    longest = max(len(gt), len(pred))
+    return {
+        "Common": common,
+        "Inversions": int(inversions),
+        "Kendall_Tau": 1 - 2 * inversions / pairs if pairs else np.nan,
+        "LCS": lcs,
+        "LCS_Ratio": lcs / longest if longest else np.nan,
+        "Positional": sum(p == g for p, g in zip(pred, gt)) / len(gt) if gt else np.nan,
+    }
+
+def ordering_metrics(gt, pred):
+    """
+    Order agreement between a GT and a predicted panel list.
+
+    Both lists are de-duplicated (first occurrence). Over the panels they
+    share, pred is mapped to GT positions; then
+      Inversions  = discordant pairs, Kendall_Tau = 1 - 2 * inversions / pairs,
+      LCS         = longest common subsequence (= LIS of the mapped positions),
+      LCS_Ratio   = LCS / max(len(gt), len(pred)) (missing / extra panels count),
+      Positional  = exact position matches / len(gt), as the old
+                    evaluate_ordering_accuracy scored it.
+    """
+    gt, pred, mapped = _mapped_positions(gt, pred)
+    return _metrics(gt, pred, mapped, count_inversions(mapped))
+
+def ordering_scores(gt_items, pred_items):
+    """
+    Batch version over exploded (id, item) tables (see PartialMatchEval.explode_items):
+    one row of ordering metrics per id, in first-seen id order.
+    """
+    gt_lists = gt_items.groupby("id", sort=False)["item"].agg(list)
+    pred_lists = pred_items.groupby("id", sort=False)["item"].agg(list)
+    ids = list(dict.fromkeys(list(gt_lists.index) + list(pred_lists.index)))
+    prepared = [_mapped_positions(gt_lists.get(i, []), pred_lists.get(i, [])) for i in ids]
+    inversions = batch_inversions([mapped for _, _, mapped in prepared])
+    rows = [{"ID": str(i), **_metrics(gt, pred, mapped, inv)}
+            for i, (gt, pred, mapped), inv in zip(ids, prepared, inversions)]
+    return pd.DataFrame(rows, columns=["ID", "Common", "Inversions", "Kendall_Tau", "LCS", "LCS_Ratio",
+                                       "Positional"])
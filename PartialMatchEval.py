@@ -0,0 +1,272 @@
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import OrderingMetrics
+import FuzzyDialogueMatch
+import NormalizeKG
+from FuzzyDialogueMatch import FUZZY_METRICS, FUZZY_THRESHOLD, fuzzy_scores, fuzzy_summary
+from BootstrapStats import N_RESAMPLES, ALPHA, bootstrap_ci, paired_test
+from OrderingMetrics import ORDERING_METRICS, ordering_scores
+from ResultCache import ResultCache, cache_key, code_digest
+from GenerateGroundTruth import OUTPUT_DIR, OUTPUT_FILES
+from NormalizeKG import canonical_labels, load_character_table, mapping_path
+from RunReasoningTasks import VARIANTS, kg_path, output_path
+
+# === CONFIG ===
+# task -> (id column, list-column keyword, task name, split on "|" only)
+# Dialogue lines may contain ";" so Task 2 splits on "|" alone, as PartialMatchTask2 does.
+TASKS = {
+    1: ("macro_event", "action", "Task 1: Action Retrieval", False),
+    2: ("event", "dialogue", "Task 2: Dialogue Trace", True),
+    3: ("event", "character", "Task 3: Character Appearance", False),
+    4: ("macro_event", "panel", "Task 4: Panel Timeline", False),
+}
+METRICS = ["Precision", "Recall", "F1", "Jaccard"]
+ORDERED_TASKS = {4}  # list order is part of the answer (panel timeline)
+FUZZY_TASKS = {2}    # free text: also score near-duplicate lines (OCR noise, punctuation)
+# task -> label kind (see NormalizeKG.py); GT items get the same canonical form
+# as the normalized KG when that variant is scored. Panel IDs are left as they are.
+CANONICAL_KINDS = {1: "action", 2: "text", 3: "character"}
+
+def ground_truth_path(book, task):
+    return f"{OUTPUT_DIR.format(book=book)}/{OUTPUT_FILES[task]}"
+
+def detailed_path(book, variant, task):
+    return f"{OUTPUT_DIR.format(book=book)}/task{task}_partial_match_detailed{VARIANTS[variant]}.csv"
+
+def summary_path(book, variant):
+    return f"{OUTPUT_DIR.format(book=book)}/partial_match_summary{VARIANTS[variant]}.csv"
+
+# === Parsing: delimited strings -> exploded (id, item) tables ===
+def explode_items(ids, values, pipe_only=False):
+    """
+    Vectorized equivalent of the parse_* helpers in PartialMatchTask1-4.
+    Returns a frame with one row per (id, item) in original order.
+    """
+    s = pd.Series(values, index=pd.Index(ids, name="id")).dropna().astype(str)
+    s = s.str.strip().str.strip("[]").str.replace("'", "", regex=False).str.replace('"', "", regex=False)
+    if pipe_only:
+        s = s.str.split("|", regex=False)
+    else:
+        s = s.str.replace("|", ";", regex=False).str.split(";", regex=False)
+    items = s.explode().str.strip()
+    items = items[items.notna() & (items != "")]
+    return items.rename("item").reset_index()
+
+def _list_column(columns, keyword, predicted):
+    cols = [c for c in columns if keyword in c and c.startswith("predicted") == predicted]
+    return cols[0]
+
+def load_item_tables(gt_path, pred_path, task):
+    id_col, keyword, _, pipe_only = TASKS[task]
+    df_gt = pd.read_csv(gt_path)
+    df_pred = pd.read_csv(pred_path)
+    df_gt.columns = [c.strip().lower() for c in df_gt.columns]
+    df_pred.columns = [c.strip().lower() for c in df_pred.columns]
+
+    gt_col = _list_column(df_gt.columns, keyword, predicted=False)
+    pred_col = _list_column(df_pred.columns, keyword, predicted=True)
+
+    # Inner join on id, as the per-task scripts do
+    df = pd.merge(df_gt[[id_col, gt_col]], df_pred[[id_col, pred_col]], on=id_col, how="inner")
+    ids = df[id_col].astype(str)
+    gt_items = explode_items(ids, df[gt_col].values, pipe_only)
+    pred_items = explode_items(ids, df[pred_col].values, pipe_only)
+    return gt_items, pred_items
+
+# === Scoring ===
+def _pair_keys(gt_items, pred_items):
+    """
+    Encode (id, item) pairs as unique int64 keys id_code * n_items + item_code.
+    """
+    id_codes, id_uniques = pd.factorize(pd.concat([gt_items["id"], pred_items["id"]], ignore_index=True))
+    item_codes, item_uniques = pd.factorize(pd.concat([gt_items["item"], pred_items["item"]], ignore_index=True))
+    keys = id_codes.astype(np.int64) * max(len(item_uniques), 1) + item_codes
+    n = len(gt_items)
+    return _sorted_unique(keys[:n]), _sorted_unique(keys[n:]), id_uniques, max(len(item_uniques), 1)
+
+def _sorted_unique(keys):
+    keys = np.sort(keys)
+    if len(keys):
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return keys
+
+def score_items(gt_items, pred_items):
+    """
+    Per-id set overlap from exploded tables: tp / n_gt / n_pred and P/R/F1/Jaccard.
+    Ids with neither GT nor predicted items are dropped (they were skipped before too).
+    """
+    gt_keys, pred_keys, id_uniques, n_items = _pair_keys(gt_items, pred_items)
+    n_ids = len(id_uniques)
+    tp = np.bincount(np.intersect1d(gt_keys, pred_keys, assume_unique=True) // n_items,
+                     minlength=n_ids).astype(float)
+    n_gt = np.bincount(gt_keys // n_items, minlength=n_ids).astype(float)
+    n_pred = np.bincount(pred_keys // n_items, minlength=n_ids).astype(float)
+    union = n_gt + n_pred - tp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(n_pred > 0, tp / n_pred, 0.0)
+        recall = np.where(n_gt > 0, tp / n_gt, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        jaccard = np.where(union > 0, tp / union, 0.0)
+
+    return pd.DataFrame({
+        "ID": np.asarray(id_uniques, dtype=str), "TP": tp, "N_GT": n_gt, "N_PRED": n_pred,
+        "Precision": precision, "Recall": recall, "F1": f1, "Jaccard": jaccard,
+    })
+
+def aggregate(scores):
+    """
+    Macro = mean of per-row scores; micro = scores of the pooled counts.
+    """
+    out = {f"Macro_{m}": float(scores[m].mean()) if len(scores) else 0.0 for m in METRICS}
+    tp, n_gt, n_pred = (float(scores[c].sum()) for c in ("TP", "N_GT", "N_PRED"))
+    p = tp / n_pred if n_pred else 0.0
+    r = tp / n_gt if n_gt else 0.0
+    out["Micro_Precision"] = p
+    out["Micro_Recall"] = r
+    out["Micro_F1"] = 2 * p * r / (p + r) if (p + r) else 0.0
+    out["Micro_Jaccard"] = tp / (n_gt + n_pred - tp) if (n_gt + n_pred - tp) else 0.0
+    out["Rows"] = int(len(scores))
+    return out
+
+def item_lists(gt_items, pred_items):
+    """
+    GT / PRED / Matched / Missing / Extra lists per id for the detailed CSV.
+    """
+    gt_lists = gt_items.groupby("id", sort=False)["item"].agg(list)
+    pred_lists = pred_items.groupby("id", sort=False)["item"].agg(list)
+    both = gt_items[["id", "item"]].drop_duplicates().merge(
+        pred_items[["id", "item"]].drop_duplicates(), on=["id", "item"], how="outer", indicator=True)
+    both = both.sort_values(["id", "item"])
+    split = {name: both[both["_merge"] == tag].groupby("id")["item"].agg(list)
+             for name, tag in (("Matched", "both"), ("Missing", "left_only"), ("Extra", "right_only"))}
+    lists = pd.DataFrame({"GT": gt_lists, "PRED": pred_lists, **split})
+    return lists.apply(lambda col: col.apply(lambda v: v if isinstance(v, list) else []))
+
+def canonicalize_items(items, kind, char_table=None):
+    items = items.copy()
+    items["item"] = canonical_labels(items["item"].tolist(), kind, char_table)
+    return items[items["item"] != ""].drop_duplicates().reset_index(drop=True)
+
+def _evaluate_task(book, task, variant, with_lists, fuzzy_threshold=FUZZY_THRESHOLD):
+    gt_items, pred_items = load_item_tables(
+        ground_truth_path(book, task), output_path(book, variant, task), task)
+    if variant == "normalized" and task in CANONICAL_KINDS:
+        char_table = load_character_table(mapping_path(kg_path(book, variant)))
+        gt_items = canonicalize_items(gt_items, CANONICAL_KINDS[task], char_table)
+        pred_items = canonicalize_items(pred_items, CANONICAL_KINDS[task], char_table)
+    scores = score_items(gt_items, pred_items)
+    summary = aggregate(scores)
+    if task in ORDERED_TASKS:
+        scores = scores.merge(ordering_scores(gt_items, pred_items), on="ID", how="left")
+        summary.update({f"Macro_{m}": float(scores[m].mean()) if scores[m].notna().any() else 0.0
+                        for m in ORDERING_METRICS})
+    if task in FUZZY_TASKS and fuzzy_threshold:
+        fuzzy = fuzzy_scores(gt_items, pred_items, fuzzy_threshold)
+        summary.update(fuzzy_summary(fuzzy))
+        scores = scores.merge(fuzzy[["ID"] + FUZZY_METRICS], on="ID", how="left")
+    detailed = scores.copy()
+    if with_lists:
+        lists = item_lists(gt_items, pred_items)
+        detailed = detailed.join(lists, on="ID")
+    detailed["Task"] = TASKS[task][2]
+    summary.update(Book=book, Variant=variant, Task=TASKS[task][2])
+    return detailed, summary
+
+def evaluate_task(book, task, variant="raw", with_lists=True, cache=None, fuzzy_threshold=FUZZY_THRESHOLD):
+    """
+    (detailed per-row frame, summary dict). With a ResultCache, unchanged
+    GT / prediction CSVs (and, for the normalized variant, the KG's mapping
+    report) and evaluation code reuse the stored result. The key
+    is content-based, so identical CSVs of another book / variant share an
+    entry: the Book / Variant / Task labels are set after the lookup.
+    """
+    if cache is None:
+        return _evaluate_task(book, task, variant, with_lists, fuzzy_threshold)
+    inputs = {"gt": ground_truth_path(book, task), "pred": output_path(book, variant, task)}
+    if variant == "normalized":
+        inputs["mapping"] = mapping_path(kg_path(book, variant))
+    key = cache_key("partial_match", inputs,
+                    code_digest(__file__, OrderingMetrics.__file__, FuzzyDialogueMatch.__file__,
+                                NormalizeKG.__file__),
+                    {"task": task, "canonical": variant == "normalized" and task in CANONICAL_KINDS,
+                     "with_lists": with_lists, "fuzzy_threshold": fuzzy_threshold})
+    value = cache.cached(key, lambda: _pack(*_evaluate_task(book, task, variant, with_lists, fuzzy_threshold)),
+                         f"book {book} / {variant} / task {task} evaluation")
+    summary = {**value["summary"], "Book": book, "Variant": variant, "Task": TASKS[task][2]}
+    return pd.DataFrame(value["detailed"]), summary
+
+def _pack(detailed, summary):
+    return {"detailed": detailed.to_dict(orient="list"), "summary": summary}
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partial-match evaluation for Tasks 1-4.")
+    parser.add_argument("--books", nargs="+", default=["0"])
+    parser.add_argument("--variant", default="raw", choices=sorted(VARIANTS))
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1, 2, 3, 4], choices=sorted(TASKS))
+    parser.add_argument("--no-lists", action="store_true",
+                        help="skip the per-row item lists (much faster on very large inputs)")
+    parser.add_argument("--fuzzy-threshold", type=float, default=FUZZY_THRESHOLD,
+                        help="MinHash Jaccard for fuzzy dialogue matches in Task 2 (0 = off)")
+    parser.add_argument("--bootstrap", type=int, default=N_RESAMPLES,
+                        help="bootstrap resamples for the P/R/F1 confidence intervals (0 = off)")
+    parser.add_argument("--alpha", type=float, default=ALPHA, help="1 - confidence level")
+    parser.add_argument("--paired-with", default=None, choices=sorted(VARIANTS),
+                        help="paired bootstrap test of --variant against this KG variant")
+    parser.add_argument("--force", action="store_true", help="recompute even when cached results exist")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the result cache")
+    args = parser.parse_args()
+
+    cache = ResultCache(force=args.force, enabled=not args.no_cache)
+
+    for book in args.books:
+        summaries = []
+        for task in args.tasks:
+            start = time.perf_counter()
+            detailed, summary = evaluate_task(book, task, args.variant, not args.no_lists, cache,
+                                              args.fuzzy_threshold)
+            if args.bootstrap:
+                summary.update(bootstrap_ci(detailed, n_resamples=args.bootstrap, alpha=args.alpha))
+            if args.paired_with and args.paired_with != args.variant:
+                baseline, _ = evaluate_task(book, task, args.paired_with, False, cache,
+                                            fuzzy_threshold=args.fuzzy_threshold)
+                summary.update(paired_test(baseline, detailed, n_resamples=args.bootstrap or N_RESAMPLES,
+                                           alpha=args.alpha))
+                summary["Paired_With"] = args.paired_with
+            rounded = [m for m in METRICS + ORDERING_METRICS + FUZZY_METRICS if m in detailed]
+            detailed[rounded] = detailed[rounded].round(2)
+            Path(detailed_path(book, args.variant, task)).parent.mkdir(parents=True, exist_ok=True)
+            detailed.drop(columns=["TP", "N_GT", "N_PRED"]).to_csv(
+                detailed_path(book, args.variant, task), index=False)
+            summaries.append(summary)
+
+            print(f"\n=== Book {book} / {summary['Task']} ({summary['Rows']} rows, "
+                  f"{time.perf_counter() - start:.2f}s) ===")
+            for m in METRICS:
+                line = f"{m:<10}: macro {summary[f'Macro_{m}']:.2f}  micro {summary[f'Micro_{m}']:.2f}"
+                if f"Macro_{m}_CI_Low" in summary:
+                    line += (f"  [{1 - args.alpha:.0%} CI macro {summary[f'Macro_{m}_CI_Low']:.2f}"
+                             f"-{summary[f'Macro_{m}_CI_High']:.2f}]")
+                if f"Paired_{m}_Diff" in summary:
+                    line += (f"  vs {args.paired_with}: {summary[f'Paired_{m}_Diff']:+.3f}"
+                             f" (p={summary[f'Paired_{m}_P']:.3f})")
+                print(line)
+            for m in ORDERING_METRICS:
+                if f"Macro_{m}" in summary:
+                    print(f"{m:<11}: macro {summary[f'Macro_{m}']:.2f}")
+            for m in FUZZY_METRICS:
+                if f"Macro_{m}" in summary:
+                    print(f"{m:<15}: macro {summary[f'Macro_{m}']:.2f}  micro {summary[f'Micro_{m}']:.2f}")
+
+        cols = ["Book", "Variant", "Task", "Rows"] + [f"{k}_{m}" for k in ("Macro", "Micro") for m in METRICS]
+        cols += [f"Macro_{m}" for m in ORDERING_METRICS if any(f"Macro_{m}" in row for row in summaries)]
+        cols += [k for k in dict.fromkeys(k for row in summaries for k in row) if k not in cols]
+        pd.DataFrame(summaries)[cols].round(4).to_csv(summary_path(book, args.variant), index=False)
+        print(f"\n✅ Summary saved to {summary_path(book, args.variant)}")
+    print("\n" + cache.report())
@@ -1,4 +1,5 @@
 import json
+import re
 import networkx as nx
 from networkx.readwrite import json_graph
 
@@ -48,6 +49,25 @@ def get_predecessors_by_relation(G, node, relation, source_type=None):
                             results.append(pred)
     return results
 
+# === Helper: Reading order
+def natural_key(node_id):
+    """
+    Numeric-aware ID key, so "0_2_0" sorts before "0_10_0".
+    """
+    return [(0, int(tok), "") if tok.isdigit() else (1, 0, tok)
+            for tok in re.split(r"(\d+)", str(node_id)) if tok]
+
+def sort_by_rank(nodes, ranks):
+    return sorted(nodes, key=lambda n: (n not in ranks, ranks.get(n, 0), natural_key(n)))
+
+def sort_by_reading_order(G, nodes):
+    """
+    Use the reading ranks of the KG's temporal index (see TemporalIndex.py);
+    fall back to natural ID order for KGs without one.
+    """
+    ranks = G.graph.get("temporal_index", {}).get("rank", {}).get("reading", {})
+    return sort_by_rank(nodes, ranks)
+
 
 # === TASK 1: Action Retrieval by Macro-event
 # def get_actions_by_macro_event(G, macro_event_id):
@@ -141,9 +161,18 @@ def get_character_appearances(G):
     """
     Traverse edges: Panel_visual_X --has_character--> Character
     Derive the panel ID from the Panel_visual node name.
+    KGs that carry a character index (see CharacterIndex.py) are answered
+    from the index instead of an edge scan.
     """
     appearances = {}
 
+    char_index = G.graph.get("character_index")
+    if char_index:
+        for label, panels in char_index["postings"]["panel"].items():
+            appearances[label] = list(panels)
+        print(f"[DEBUG] Character appearances: {appearances}")
+        return appearances
+
     for u, v, d in G.edges(data=True):
         if d.get("relation") != "has_character":
             continue
@@ -173,7 +202,99 @@ def get_panels_by_macro_event(G, macro_event_id):
             for panel in get_predecessors_by_relation(G, segment, "instantiates", "panel"):
                 panels.append(panel)
     print(f"[DEBUG] Panels for macro-event '{macro_event_id}': {panels}")
-    return sorted(panels)
+    return sort_by_reading_order(G, panels)
+
+# === STREAMING VARIANTS ===
+# Generators that yield results as the traversal discovers them (no final
+# sort, no full result set). `limit` stops the walk after that many items.
+def _take(items, limit):
+    if limit is not None and limit <= 0:
+        return
+    for count, item in enumerate(items, start=1):
+        yield item
+        if limit is not None and count >= limit:
+            return
+
+def _iter_panels(G, node, levels):
+    """
+    Panels under `node`; levels is the chain of child types below it,
+    e.g. ["event", "event_segment"] for a macro-event.
+    """
+    if not levels:
+        yield from get_predecessors_by_relation(G, node, "instantiates", "panel")
+        return
+    for child in get_predecessors_by_relation(G, node, "subevent_of", levels[0]):
+        yield from _iter_panels(G, child, levels[1:])
+
+def _iter_unique(items):
+    seen = set()
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
+
+def _iter_action_labels(G, macro_event_id):
+    for panel in _iter_panels(G, macro_event_id, ["event", "event_segment"]):
+        panel_visual = f"Panel_visual_{panel}"
+        if panel_visual in G:
+            for act in get_successors_by_relation(G, panel_visual, "has_action", "action"):
+                label = G.nodes[act].get("label")
+                if label:
+                    yield label
+
+def _iter_dialogue_lines(G, event_id):
+    for panel in _iter_panels(G, event_id, ["event_segment"]):
+        pt_node = f"Panel_textual_{panel}"
+        if pt_node not in G:
+            continue
+        for dlg in get_predecessors_by_relation(G, pt_node, "part_of", "dialogue"):
+            for pred in G.predecessors(dlg):
+                if G.nodes[pred].get("type") == "text":
+                    label = G.nodes[pred].get("label")
+                    if label:
+                        yield label
+
+def _iter_event_characters(G, event_id):
+    for panel in _iter_panels(G, event_id, ["event_segment"]):
+        panel_visual = f"Panel_visual_{panel}"
+        if panel_visual in G:
+            for c in get_successors_by_relation(G, panel_visual, "has_character", "character"):
+                yield G.nodes[c].get("label", c).strip()
+
+# === TASK 1 (streaming)
+def iter_actions_by_macro_event(G, macro_event_id, limit=None):
+    yield from _take(_iter_unique(_iter_action_labels(G, macro_event_id)), limit)
+
+# === TASK 2 (streaming)
+def iter_dialogues_by_event(G, event_id, limit=None):
+    yield from _take(_iter_unique(_iter_dialogue_lines(G, event_id)), limit)
+
+# === TASK 3 (streaming)
+def iter_character_appearances(G, limit=None):
+    """
+    Yields (character, panel_id) pairs, from the character index postings
+    when the KG carries one (see CharacterIndex.py), else from an edge scan.
+    """
+    def pairs():
+        char_index = G.graph.get("character_index")
+        if char_index:
+            for label, panels in char_index["postings"]["panel"].items():
+                for panel_id in panels:
+                    yield label, panel_id
+            return
+        for u, v, d in G.edges(data=True):
+            if d.get("relation") != "has_character" or not u.startswith("Panel_visual_"):
+                continue
+            if G.nodes[u].get("type") == "panel_visual" and G.nodes[v].get("type") == "character":
+                yield G.nodes[v].get("label", v).strip(), u.replace("Panel_visual_", "")
+    yield from _take(pairs(), limit)
+
+def iter_characters_by_event(G, event_id, limit=None):
+    yield from _take(_iter_unique(_iter_event_characters(G, event_id)), limit)
+
+# === TASK 4 (streaming, traversal order — see sort_by_reading_order)
+def iter_panels_by_macro_event(G, macro_event_id, limit=None):
+    yield from _take(_iter_panels(G, macro_event_id, ["event", "event_segment"]), limit)
 
 # === MAIN TESTING ===
 if __name__ == "__main__":
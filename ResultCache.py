@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+
+# === CONFIG ===
+CACHE_DIR = ".cache/results"
+
+# === Content hashes ===
+_DIGESTS = {}  # (path, size, mtime_ns) -> sha256, so unchanged files are hashed once per process
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    sha256 of a file's content; None for a missing file.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if stamp not in _DIGESTS:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        _DIGESTS[stamp] = h.hexdigest()
+    return _DIGESTS[stamp]
+
+def code_digest(*paths):
+    """
+    Code version = hash of the source files that produce a result.
+    """
+    return hashlib.sha256("".join(file_digest(p) or "" for p in paths).encode()).hexdigest()
+
+def cache_key(kind, inputs, code, params=None):
+    """
+    kind: result family, e.g. "reasoning" / "partial_match";
+    inputs: {name: path} hashed by content; code: code_digest(...);
+    params: anything else that changes the result (JSON-serializable).
+    """
+    payload = {
+        "kind": kind,
+        "inputs": {name: file_digest(path) for name, path in sorted(inputs.items())},
+        "code": code,
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+# === Store ===
+class ResultCache:
+    """
+    Content-addressed store of JSON results: .cache/results/<key[:2]>/<key>.json.
+    Each entry keeps the seconds it took to compute, so the report can show
+    the time saved by hits. force=True recomputes (and overwrites) everything.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, force=False, enabled=True):
+        self.cache_dir = Path(cache_dir)
+        self.force = force
+        self.enabled = enabled
+        self.hits, self.misses = [], []
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key, name=None):
+        if not self.enabled or self.force:
+            return None
+        path = self._path(key)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        self.hits.append((name or key[:12], entry["seconds"]))
+        return entry["value"]
+
+    def put(self, key, value, seconds, name=None):
+        self.misses.append((name or key[:12], seconds))
+        if not self.enabled:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seconds": seconds, "created": time.time(), "value": value}, f, ensure_ascii=False)
+        os.replace(tmp, path)  # atomic, so parallel runners never read half an entry
+
+    def cached(self, key, compute, name=None):
+        """
+        Return the stored value for key, or compute(), store and return it.
+        """
+        value = self.get(key, name)
+        if value is None:
+            start = time.perf_counter()
+            value = compute()
+            self.put(key, value, time.perf_counter() - start, name)
+        return value
+
+    def report(self):
+        saved = sum(seconds for _, seconds in self.hits)
+        lines = [f"Cache: {len(self.hits)} hit(s), {len(self.misses)} miss(es), "
+                 f"~{saved:.2f}s of compute reused ({self.cache_dir})"]
+        lines += [f"  hit   {name}" for name, _ in self.hits]
+        lines += [f"  miss  {name} ({seconds:.3f}s)" for name, seconds in self.misses]
+        return "\n".join(lines)
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import argparse
+from contextlib import contextmanager
+
+from networkx.readwrite import json_graph
+
+from GeneratePanelKGs_updated import build_panel_graph
+from BuildEventKG_withID_Temporal import build_event_kg
+from BuildSequenceKG_updated import build_sequence_kg
+from IntegrateKnowledgeGraphs import integrate_graphs, load_graph_json, load_panel_graphs
+from TextIndex import build_text_index, text_index_path
+from TemporalConstraints import STORY_ORDER, load_overrides
+from AssignEventIDs import FORMATS, PARQUET_HINT, parquet_available, read_annotation_table, table_path
+
+# === CONFIG ===
+BOOK = "0"
+DATA_DIR = "Data/Annotation_Book_{book}"
+EXCEL_FILE = "Story_{book}_with_IDs.xlsx"
+STORY_ORDER_FILE = "story_order.csv"  # optional Before,After overrides next to the annotations
+KG_DIR = "Data/KGs_Book_{book}"
+# Intermediate files, at the paths IntegrateKnowledgeGraphs.py reads them from
+PANEL_KG_DIR = "panel_graphs"
+EVENT_KG_FILE = "event_kg/event_kg.json"
+SEQUENCE_KG_FILE = "sequence_kg/sequence_kg.json"
+OUTPUT_FILE = "integrated_kg.json"
+ROUNDTRIP_STAGES = ["write_panel_kgs", "write_event_kg", "write_sequence_kg",
+                    "load_panel_kgs", "load_event_kg", "load_sequence_kg"]
+
+# === Stage timing ===
+class StageTimer:
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self, io_stages=ROUNDTRIP_STAGES):
+        total = sum(self.seconds.values())
+        lines = [f"{'stage':<20} {'seconds':>9} {'share':>7}"]
+        for name, sec in self.seconds.items():
+            lines.append(f"{name:<20} {sec:9.3f} {sec / total if total else 0:7.1%}")
+        io = sum(self.seconds.get(name, 0.0) for name in io_stages)
+        lines.append(f"{'total':<20} {total:9.3f}")
+        if io:
+            lines.append(f"{'intermediate JSON':<20} {io:9.3f} {io / total:7.1%}")
+        return "\n".join(lines)
+
+# === Inputs ===
+def load_annotations(book, data_dir=None, fmt="excel", sheet=None):
+    """
+    (annotation frame, {"{book}_{page}": page dict}) as written by the
+    annotation UI / SyntheticCorpus.py. fmt="parquet" reads the copy written
+    by AssignEventIDs.py --format parquet instead of the workbook; sheet picks
+    a sheet of the workbook (or its {stem}_{sheet}.parquet with --all-sheets).
+    """
+    data_dir = data_dir or DATA_DIR.format(book=book)
+    path = table_path(os.path.join(data_dir, EXCEL_FILE.format(book=book)), fmt, sheet)
+    df = read_annotation_table(path, sheet_name=sheet if fmt == "excel" and sheet is not None else 0)
+    pages = {}
+    for fname in sorted(os.listdir(data_dir)):
+        if fname.endswith(".json"):
+            with open(os.path.join(data_dir, fname), "r", encoding="utf-8") as f:
+                pages[fname[:-len(".json")]] = json.load(f)
+    return df, pages
+
+def build_panel_graphs(df, pages):
+    metadata = df.dropna(subset=["Index"]).drop_duplicates("Index").set_index("Index").to_dict("index")
+    return {panel_id: build_panel_graph(panel, panel_id, metadata.get(panel_id, {}))
+            for stem, page in pages.items()
+            for panel_id, panel in ((f"{stem}_{i}", p) for i, p in enumerate(page["panels"]))}
+
+# === Intermediate files ===
+def write_graph_json(G, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(json_graph.node_link_data(G), f, indent=2, ensure_ascii=False)
+
+def write_intermediates(kg_dir, panel_graphs, G_event, G_seq, timer):
+    with timer.stage("write_panel_kgs"):
+        for panel_id, G_panel in panel_graphs.items():
+            write_graph_json(G_panel, os.path.join(kg_dir, PANEL_KG_DIR, f"{panel_id}.json"))
+    with timer.stage("write_event_kg"):
+        write_graph_json(G_event, os.path.join(kg_dir, EVENT_KG_FILE))
+    with timer.stage("write_sequence_kg"):
+        write_graph_json(G_seq, os.path.join(kg_dir, SEQUENCE_KG_FILE))
+
+def load_intermediates(kg_dir, timer):
+    with timer.stage("load_panel_kgs"):
+        panel_graphs = load_panel_graphs(os.path.join(kg_dir, PANEL_KG_DIR))
+    with timer.stage("load_event_kg"):
+        G_event = load_graph_json(os.path.join(kg_dir, EVENT_KG_FILE))
+    with timer.stage("load_sequence_kg"):
+        G_seq = load_graph_json(os.path.join(kg_dir, SEQUENCE_KG_FILE))
+    return panel_graphs, G_event, G_seq
+
+# === Pipeline ===
+def run_pipeline(df, pages, kg_dir=None, write_intermediate=False, roundtrip=False, timer=None,
+                 story_order=STORY_ORDER):
+    """
+    Panel, event and sequence KGs built in one process and integrated in
+    memory. Intermediate JSON is written only with write_intermediate;
+    roundtrip additionally re-reads it and integrates the parsed graphs,
+    which is the file-based path the standalone scripts take. Both the
+    event and the sequence KG get their story time from story_order plus
+    Narrative_Time.
+    Returns (integrated graph, timer).
+    """
+    timer = timer or StageTimer()
+    with timer.stage("panel_kgs"):
+        panel_graphs = build_panel_graphs(df, pages)
+    with timer.stage("event_kg"):
+        G_event = build_event_kg(df, story_order)
+    with timer.stage("sequence_kg"):
+        G_seq, _ = build_sequence_kg(df, story_order)
+
+    if write_intermediate or roundtrip:
+        write_intermediates(kg_dir, panel_graphs, G_event, G_seq, timer)
+    if roundtrip:
+        panel_graphs, G_event, G_seq = load_intermediates(kg_dir, timer)
+
+    with timer.stage("integrate"):
+        G_all = integrate_graphs(panel_graphs, G_seq, G_event)
+    return G_all, timer
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Annotations -> integrated KG in one process.")
+    parser.add_argument("--book", default=BOOK)
+    parser.add_argument("--data-dir", default=None, help=f"default: {DATA_DIR}")
+    parser.add_argument("--kg-dir", default=None, help=f"default: {KG_DIR}")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="excel",
+                        help="annotation file written by AssignEventIDs.py to read")
+    parser.add_argument("--sheet", default=None, help="annotation sheet (default: the first)")
+    parser.add_argument("--write-intermediate", action="store_true",
+                        help="also save panel_graphs/, event_kg.json and sequence_kg.json")
+    parser.add_argument("--roundtrip", action="store_true",
+                        help="write the intermediate JSON and integrate from the re-read files (old path)")
+    args = parser.parse_args()
+    if args.format == "parquet" and not parquet_available():
+        parser.error(PARQUET_HINT)
+
+    kg_dir = args.kg_dir or KG_DIR.format(book=args.book)
+    timer = StageTimer()
+    with timer.stage("read_annotations"):
+        df, pages = load_annotations(args.book, args.data_dir, args.format, args.sheet)
+    override_file = os.path.join(args.data_dir or DATA_DIR.format(book=args.book), STORY_ORDER_FILE)
+    story_order = STORY_ORDER + (load_overrides(override_file) if os.path.exists(override_file) else [])
+    G_all, _ = run_pipeline(df, pages, kg_dir, args.write_intermediate, args.roundtrip, timer, story_order)
+
+    output_path = os.path.join(kg_dir, OUTPUT_FILE)
+    with timer.stage("write_integrated_kg"):
+        write_graph_json(G_all, output_path)
+    with timer.stage("text_index"):
+        build_text_index(G_all).save(text_index_path(output_path))
+
+    print(f"✅ Unified graph saved to {output_path} ({G_all.number_of_nodes()} nodes, "
+          f"{G_all.number_of_edges()} edges, {len(pages)} pages)")
+    print(f"✅ Text index saved to {text_index_path(output_path)}")
+    for src, tgt, source in G_all.graph.get("storytime_conflicts", []):
+        print(f"⚠️ Story-time {source} {src} → {tgt} contradicts an earlier constraint; skipped")
+    print("\n" + timer.report())
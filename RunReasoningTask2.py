@@ -1,45 +1,48 @@
-import json
+import sys
 import csv
+import argparse
 from pathlib import Path
-from networkx.readwrite import json_graph
-from ReasoningQueries_updated_2 import get_dialogues_by_event  # Update if needed
-
-# === Paths ===
-
-GROUND_TRUTH_PATH = "Data/KGs_Book_1/ground_truth_task2_dialogues.csv"
-# KG_PATH = "Data/KGs_Book_1/integrated_kg.json"
-# OUTPUT_CSV_PATH = "Data/KGs_Book_1/reasoning_task2_dialogues.csv"
-
-KG_PATH = "Data/KGs_Book_1/integrated_kg_normalized.json"
-OUTPUT_CSV_PATH = "Data/KGs_Book_1/reasoning_task2_dialogues_normalized.csv"
+from ReasoningQueries_updated_2 import load_kg, iter_dialogues_by_event
+from ResultCache import ResultCache
+from RunReasoningTasks import VARIANTS, ground_truth_path, kg_path, output_path, run_tasks
+
+# Reasoning Task 2 (dialogue lines per event): the cached run is RunReasoningTasks.py --tasks 2
+TASK = 2
+
+# === Options ===
+parser = argparse.ArgumentParser()
+parser.add_argument("--book", default="1", help="book number (Data/KGs_Book_<book>)")
+parser.add_argument("--variant", default="normalized", choices=sorted(VARIANTS))
+parser.add_argument("--stream", action="store_true",
+                    help="write each row as soon as it is computed, items in discovery order (not cached)")
+parser.add_argument("--limit", type=int, default=None,
+                    help="keep at most N items per row (streaming mode)")
+parser.add_argument("--verbose", action="store_true", help="keep the [DEBUG] output of the queries")
+parser.add_argument("--force", action="store_true", help="recompute even when cached results exist")
+parser.add_argument("--no-cache", action="store_true", help="neither read nor write the result cache")
+args = parser.parse_args()
+
+# === Cached run: same rows and cache entries as RunReasoningTasks.py
+if not args.stream:
+    cache = ResultCache(force=args.force, enabled=not args.no_cache)
+    run_tasks(args.book, args.variant, [TASK], workers=1, verbose=args.verbose, cache=cache)
+    print("\n" + cache.report())
+    sys.exit(0)
 
 # === Load KG ===
-with open(KG_PATH, "r", encoding="utf-8") as f:
-    kg_data = json.load(f)
-G = json_graph.node_link_graph(kg_data)
+OUTPUT_CSV_PATH = output_path(args.book, args.variant, TASK)
+G = load_kg(kg_path(args.book, args.variant))
 
-# === Load ground-truth event list ===
-event_ids = []
-with open(GROUND_TRUTH_PATH, "r", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        event_ids.append(row["Event"])
-
-# === Run reasoning for each event
-results = []
-for event_id in event_ids:
-    predicted = get_dialogues_by_event(G, event_id)
-    results.append({
-        "Event": event_id,
-        "Predicted_Dialogues": " | ".join(sorted(predicted))
-    })
-
-# === Save results to CSV
+# === Streaming mode: read targets and write predictions row by row
 Path(OUTPUT_CSV_PATH).parent.mkdir(parents=True, exist_ok=True)
-with open(OUTPUT_CSV_PATH, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=["Event", "Predicted_Dialogues"])
+with open(ground_truth_path(args.book, TASK), "r", encoding="utf-8") as f_in, \
+        open(OUTPUT_CSV_PATH, "w", newline="", encoding="utf-8") as f_out:
+    writer = csv.DictWriter(f_out, fieldnames=["Event", "Predicted_Dialogues"])
     writer.writeheader()
-    for row in results:
-        writer.writerow(row)
-
-print(f"✅ Reasoning predictions saved to: {OUTPUT_CSV_PATH}")
+    for row in csv.DictReader(f_in):
+        event_id = row["Event"]
+        writer.writerow({
+            "Event": event_id,
+            "Predicted_Dialogues": " | ".join(iter_dialogues_by_event(G, event_id, args.limit))
+        })
+print(f"✅ Reasoning predictions streamed to: {OUTPUT_CSV_PATH}")
@@ -1,52 +1,46 @@
-import json
+import sys
 import csv
-import pandas as pd
+import argparse
 from pathlib import Path
-from networkx.readwrite import json_graph
-from ReasoningQueries_updated_2 import get_character_appearances  # Update if needed
-
-# === Paths ===
-
-ANNOTATION_XLSX = "Data/Annotation_Book_1/Story_1_with_IDs.xlsx"
-# KG_PATH = "Data/KGs_Book_1/integrated_kg.json"
-# OUTPUT_CSV_PATH = "Data/KGs_Book_1/reasoning_task3_characters.csv"
-
-
-KG_PATH = "Data/KGs_Book_1/integrated_kg_normalized.json"
-OUTPUT_CSV_PATH = "Data/KGs_Book_1/reasoning_task3_characters_normalized.csv"
+from ReasoningQueries_updated_2 import load_kg, iter_characters_by_event
+from ResultCache import ResultCache
+from RunReasoningTasks import VARIANTS, kg_path, output_path, run_tasks
+
+# Reasoning Task 3 (characters per event): the cached run is RunReasoningTasks.py --tasks 3
+TASK = 3
+
+# === Options ===
+parser = argparse.ArgumentParser()
+parser.add_argument("--book", default="1", help="book number (Data/KGs_Book_<book>)")
+parser.add_argument("--variant", default="normalized", choices=sorted(VARIANTS))
+parser.add_argument("--stream", action="store_true",
+                    help="write each row as soon as it is computed, items in discovery order (not cached)")
+parser.add_argument("--limit", type=int, default=None,
+                    help="keep at most N items per row (streaming mode)")
+parser.add_argument("--verbose", action="store_true", help="keep the [DEBUG] output of the queries")
+parser.add_argument("--force", action="store_true", help="recompute even when cached results exist")
+parser.add_argument("--no-cache", action="store_true", help="neither read nor write the result cache")
+args = parser.parse_args()
+
+# === Cached run: same rows and cache entries as RunReasoningTasks.py
+if not args.stream:
+    cache = ResultCache(force=args.force, enabled=not args.no_cache)
+    run_tasks(args.book, args.variant, [TASK], workers=1, verbose=args.verbose, cache=cache)
+    print("\n" + cache.report())
+    sys.exit(0)
 
 # === Load KG ===
-with open(KG_PATH, "r", encoding="utf-8") as f:
-    kg_data = json.load(f)
-G = json_graph.node_link_graph(kg_data)
-
-# === Load panel → event mapping from Excel ===
-df = pd.read_excel(ANNOTATION_XLSX)
-df = df.dropna(subset=["Index", "Plot_1_ID"])
+OUTPUT_CSV_PATH = output_path(args.book, args.variant, TASK)
+G = load_kg(kg_path(args.book, args.variant))
 
-panel_to_event = {}
-for _, row in df.iterrows():
-    panel_id = str(row["Index"]).strip()
-    event_id = str(row["Plot_1_ID"]).strip()
-    panel_to_event[panel_id] = event_id
-
-# === Run character appearance reasoning
-char_to_panels = get_character_appearances(G)
-
-# === Aggregate character appearances by event
-event_to_characters = {}
-for char, panels in char_to_panels.items():
-    for panel in panels:
-        event_id = panel_to_event.get(panel)
-        if event_id:
-            event_to_characters.setdefault(event_id, set()).add(char)
-
-# === Write to CSV
+# === Streaming mode: walk each event's panels and write its row immediately
 Path(OUTPUT_CSV_PATH).parent.mkdir(parents=True, exist_ok=True)
+events = sorted(n for n, d in G.nodes(data=True) if d.get("type") == "event")
 with open(OUTPUT_CSV_PATH, "w", newline='', encoding="utf-8") as f:
     writer = csv.writer(f)
     writer.writerow(["Event", "Predicted_Characters"])
-    for event, chars in sorted(event_to_characters.items()):
-        writer.writerow([event, " | ".join(sorted(chars))])
-
-print(f"✅ Reasoning predictions saved to: {OUTPUT_CSV_PATH}")
+    for event in events:
+        chars = list(iter_characters_by_event(G, event, args.limit))
+        if chars:
+            writer.writerow([event, " | ".join(chars)])
+print(f"✅ Reasoning predictions streamed to: {OUTPUT_CSV_PATH}")
@@ -1,44 +1,48 @@
-import json
+import sys
 import csv
+import argparse
 from pathlib import Path
-from networkx.readwrite import json_graph
-from ReasoningQueries_updated_2 import get_panels_by_macro_event  # Ensure this is in your script
+from ReasoningQueries_updated_2 import load_kg, iter_panels_by_macro_event
+from ResultCache import ResultCache
+from RunReasoningTasks import VARIANTS, ground_truth_path, kg_path, output_path, run_tasks
 
-# === Paths ===
-GROUND_TRUTH_PATH = "Data/KGs_Book_1/ground_truth_task4_panels.csv"
-KG_PATH = "Data/KGs_Book_1/integrated_kg.json"
-OUTPUT_CSV_PATH = "Data/KGs_Book_1/reasoning_task4_panels.csv"
+# Reasoning Task 4 (panels per macro-event): the cached run is RunReasoningTasks.py --tasks 4
+TASK = 4
 
-KG_PATH = "Data/KGs_Book_1/integrated_kg_normalized.json"
-OUTPUT_CSV_PATH = "Data/KGs_Book_1/reasoning_task4_panels_normalized.csv"
+# === Options ===
+parser = argparse.ArgumentParser()
+parser.add_argument("--book", default="1", help="book number (Data/KGs_Book_<book>)")
+parser.add_argument("--variant", default="normalized", choices=sorted(VARIANTS))
+parser.add_argument("--stream", action="store_true",
+                    help="write each row as soon as it is computed, items in discovery order (not cached)")
+parser.add_argument("--limit", type=int, default=None,
+                    help="keep at most N items per row (streaming mode)")
+parser.add_argument("--verbose", action="store_true", help="keep the [DEBUG] output of the queries")
+parser.add_argument("--force", action="store_true", help="recompute even when cached results exist")
+parser.add_argument("--no-cache", action="store_true", help="neither read nor write the result cache")
+args = parser.parse_args()
 
-# === Load KG ===
-with open(KG_PATH, "r", encoding="utf-8") as f:
-    kg_data = json.load(f)
-G = json_graph.node_link_graph(kg_data)
-
-# === Load macro-event list from ground truth
-macro_events = []
-with open(GROUND_TRUTH_PATH, "r", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        macro_events.append(row["Macro_event"])
+# === Cached run: same rows and cache entries as RunReasoningTasks.py
+if not args.stream:
+    cache = ResultCache(force=args.force, enabled=not args.no_cache)
+    run_tasks(args.book, args.variant, [TASK], workers=1, verbose=args.verbose, cache=cache)
+    print("\n" + cache.report())
+    sys.exit(0)
 
-# === Run reasoning function for each macro-event
-results = []
-for macro in macro_events:
-    predicted_panels = get_panels_by_macro_event(G, macro)
-    results.append({
-        "Macro_event": macro,
-        "Predicted_Panels": " | ".join(predicted_panels)
-    })
+# === Load KG ===
+OUTPUT_CSV_PATH = output_path(args.book, args.variant, TASK)
+G = load_kg(kg_path(args.book, args.variant))
 
-# === Save results to CSV
+# === Streaming mode: read targets and write predictions row by row
 Path(OUTPUT_CSV_PATH).parent.mkdir(parents=True, exist_ok=True)
-with open(OUTPUT_CSV_PATH, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=["Macro_event", "Predicted_Panels"])
+with open(ground_truth_path(args.book, TASK), "r", encoding="utf-8") as f_in, \
+        open(OUTPUT_CSV_PATH, "w", newline="", encoding="utf-8") as f_out:
+    writer = csv.DictWriter(f_out, fieldnames=["Macro_event", "Predicted_Panels"])
     writer.writeheader()
-    for row in results:
-        writer.writerow(row)
-
-print(f"✅ Reasoning predictions saved to: {OUTPUT_CSV_PATH}")
+    for row in csv.DictReader(f_in):
+        macro = row["Macro_event"]
+        writer.writerow({
+            "Macro_event": macro,
+            "Predicted_Panels": " | ".join(iter_panels_by_macro_event(G, macro, args.limit))
+        })
+print(f"✅ Reasoning predictions streamed to: {OUTPUT_CSV_PATH}")
@@ -0,0 +1,196 @@
+import io
+import csv
+import time
+import inspect
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from ResultCache import ResultCache, cache_key, code_digest
+from ReasoningQueries_updated_2 import (
+    load_kg,
+    get_actions_by_macro_event,
+    get_dialogues_by_event,
+    get_character_appearances,
+    get_panels_by_macro_event,
+)
+
+# === CONFIG ===
+KG_DIR = "Data/KGs_Book_{book}"
+ANNOTATION_XLSX = "Data/Annotation_Book_{book}/Story_{book}_with_IDs.xlsx"
+VARIANTS = {"raw": "", "normalized": "_normalized"}
+
+# task -> (ground-truth CSV, id column, prediction column, output CSV stem)
+TASKS = {
+    1: ("ground_truth_task1_actions.csv", "Macro_event", "Predicted_Actions", "reasoning_task1_actions"),
+    2: ("ground_truth_task2_dialogues.csv", "Event", "Predicted_Dialogues", "reasoning_task2_dialogues"),
+    3: (None, "Event", "Predicted_Characters", "reasoning_task3_characters"),
+    4: ("ground_truth_task4_panels.csv", "Macro_event", "Predicted_Panels", "reasoning_task4_panels"),
+}
+
+# === Paths ===
+def kg_path(book, variant="raw"):
+    return f"{KG_DIR.format(book=book)}/integrated_kg{VARIANTS[variant]}.json"
+
+def ground_truth_path(book, task):
+    return f"{KG_DIR.format(book=book)}/{TASKS[task][0]}"
+
+def output_path(book, variant, task):
+    return f"{KG_DIR.format(book=book)}/{TASKS[task][3]}{VARIANTS[variant]}.csv"
+
+# === Inputs (loaded once) ===
+def load_targets(path, id_col):
+    with open(path, "r", encoding="utf-8") as f:
+        return [row[id_col] for row in csv.DictReader(f)]
+
+def load_panel_to_event(book):
+    df = pd.read_excel(ANNOTATION_XLSX.format(book=book))
+    df = df.dropna(subset=["Index", "Plot_1_ID"])
+    return dict(zip(df["Index"].astype(str).str.strip(), df["Plot_1_ID"].astype(str).str.strip()))
+
+def load_inputs(book, tasks, G):
+    inputs = {}
+    for task in tasks:
+        gt_file, id_col = TASKS[task][0], TASKS[task][1]
+        if gt_file:
+            inputs[task] = load_targets(ground_truth_path(book, task), id_col)
+    # Task 3 only needs Excel for KGs integrated before the character index
+    if 3 in tasks and "character_index" not in G.graph:
+        inputs[3] = load_panel_to_event(book)
+    return inputs
+
+# === Task bodies (each returns CSV rows) ===
+def characters_by_event(G, panel_to_event=None):
+    event_to_characters = {}
+    char_index = G.graph.get("character_index")
+    if char_index:
+        for char, events in char_index["postings"]["event"].items():
+            for event_id in events:
+                event_to_characters.setdefault(event_id, set()).add(char)
+    else:
+        for char, panels in get_character_appearances(G).items():
+            for panel in panels:
+                event_id = panel_to_event.get(panel)
+                if event_id:
+                    event_to_characters.setdefault(event_id, set()).add(char)
+    return event_to_characters
+
+def run_task(task, G, targets):
+    _, id_col, pred_col, _ = TASKS[task]
+    if task == 1:
+        return [{id_col: m, pred_col: " | ".join(sorted(get_actions_by_macro_event(G, m)))} for m in targets]
+    if task == 2:
+        return [{id_col: e, pred_col: " | ".join(sorted(get_dialogues_by_event(G, e)))} for e in targets]
+    if task == 3:
+        return [{id_col: e, pred_col: " | ".join(sorted(chars))}
+                for e, chars in sorted(characters_by_event(G, targets).items())]
+    if task == 4:
+        return [{id_col: m, pred_col: " | ".join(get_panels_by_macro_event(G, m))} for m in targets]
+    raise ValueError(f"Unknown task: {task}")
+
+def write_rows(path, task, rows):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[TASKS[task][1], TASKS[task][2]])
+        writer.writeheader()
+        writer.writerows(rows)
+
+# === Workers ===
+# Forked workers inherit the loaded KG and inputs through this global instead
+# of re-reading or pickling them.
+_SHARED = {}
+
+def _timed_task(task, verbose=False):
+    G, inputs = _SHARED["G"], _SHARED["inputs"]
+    start = time.perf_counter()
+    if verbose:
+        rows = run_task(task, G, inputs.get(task))
+    else:
+        with redirect_stdout(io.StringIO()):  # silence [DEBUG] prints
+            rows = run_task(task, G, inputs.get(task))
+    return task, rows, time.perf_counter() - start
+
+# === Cache keys ===
+def task_cache_key(book, variant, task):
+    """
+    Predictions depend on the KG, the task's targets and the query code.
+    """
+    inputs = {"kg": kg_path(book, variant)}
+    if TASKS[task][0]:
+        inputs["targets"] = ground_truth_path(book, task)
+    else:
+        inputs["annotations"] = ANNOTATION_XLSX.format(book=book)
+    code = code_digest(__file__, inspect.getsourcefile(get_actions_by_macro_event))
+    return cache_key("reasoning", inputs, code, {"task": task})
+
+def run_tasks(book, variant="raw", tasks=(1, 2, 3, 4), workers=None, verbose=False, cache=None):
+    """
+    Load the KG and inputs once, run the requested tasks and write their CSVs.
+    With a ResultCache, tasks whose KG / targets / code are unchanged reuse their
+    stored rows, and the KG is not loaded at all when every task is cached.
+    Returns {"load": seconds, task: seconds, ...}.
+    """
+    timings = {"load": 0.0}
+    results, keys = [], {}
+    if cache is not None:
+        for task in tasks:
+            keys[task] = task_cache_key(book, variant, task)
+            rows = cache.get(keys[task], f"book {book} / {variant} / task {task}")
+            if rows is not None:
+                results.append((task, rows, 0.0))
+    pending = [task for task in tasks if task not in {t for t, _, _ in results}]
+
+    if pending:
+        start = time.perf_counter()
+        G = load_kg(kg_path(book, variant))
+        inputs = load_inputs(book, pending, G)
+        timings["load"] = time.perf_counter() - start
+        _SHARED.update(G=G, inputs=inputs)
+
+        workers = len(pending) if workers is None else workers
+        can_fork = "fork" in mp.get_all_start_methods()
+        if workers > 1 and len(pending) > 1 and can_fork:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("fork")) as pool:
+                computed = list(pool.map(_timed_task, pending, [verbose] * len(pending)))
+        else:
+            computed = [_timed_task(task, verbose) for task in pending]
+
+        for task, rows, elapsed in computed:
+            if cache is not None:
+                cache.put(keys[task], rows, elapsed, f"book {book} / {variant} / task {task}")
+        results += computed
+
+    for task, rows, elapsed in sorted(results, key=lambda r: tasks.index(r[0])):
+        write_rows(output_path(book, variant, task), task, rows)
+        timings[task] = elapsed
+        note = "cached" if task not in pending else f"{elapsed:.3f}s"
+        print(f"✅ Task {task}: {len(rows)} rows → {output_path(book, variant, task)} ({note})")
+    return timings
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run reasoning Tasks 1-4 on one KG in one process.")
+    parser.add_argument("--book", default="1", help="book number (Data/KGs_Book_<book>)")
+    parser.add_argument("--variant", default="normalized", choices=sorted(VARIANTS))
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1, 2, 3, 4], choices=sorted(TASKS))
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per task)")
+    parser.add_argument("--verbose", action="store_true", help="keep the [DEBUG] output of the queries")
+    parser.add_argument("--force", action="store_true", help="recompute even when cached results exist")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the result cache")
+    args = parser.parse_args()
+
+    cache = ResultCache(force=args.force, enabled=not args.no_cache)
+    start = time.perf_counter()
+    timings = run_tasks(args.book, args.variant, list(args.tasks), args.workers, args.verbose, cache)
+    total = time.perf_counter() - start
+
+    print("\n=== Timings ===")
+    print(f"load KG + inputs : {timings['load']:.3f}s")
+    for task in args.tasks:
+        print(f"Task {task}           : {timings[task]:.3f}s")
+    print(f"total            : {total:.3f}s")
+    print("\n" + cache.report())
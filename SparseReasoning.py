@@ -0,0 +1,171 @@
+import numpy as np
+import scipy.sparse as sp
+
+from ReasoningQueries_updated_2 import load_kg, sort_by_rank
+
+# === Sparse incidence backend ===
+# Each hierarchy relation becomes an N×N child→parent incidence matrix over a
+# single node index, and panel content becomes a panel×label matrix, so every
+# Task 1-4 rollup is one chain of sparse products for all targets at once:
+#   Task 1: macro×event · event×segment · segment×panel · panel×action
+#   Task 2: event×segment · segment×panel · panel×dialogue
+#   Task 3: event×segment · segment×panel · panel×character
+#   Task 4: macro×event · event×segment · segment×panel
+
+class SparseKG:
+    def __init__(self, nodes, node_types, matrices, label_vocab, reading_rank=None):
+        self.nodes = nodes                  # index -> node id
+        self.node_index = {n: i for i, n in enumerate(nodes)}
+        self.node_types = node_types        # index -> type
+        self.matrices = matrices            # name -> csr_matrix
+        self.label_vocab = label_vocab      # name -> [label, ...] (matrix columns)
+        self.reading_rank = reading_rank or {}
+
+    def nodes_of_type(self, node_type):
+        return [n for n, t in zip(self.nodes, self.node_types) if t == node_type]
+
+
+def _incidence(rows, cols, shape):
+    data = np.ones(len(rows), dtype=np.int64)
+    M = sp.coo_matrix((data, (rows, cols)), shape=shape).tocsr()
+    M.sum_duplicates()
+    return M
+
+def _label_matrix(pairs, n_rows):
+    """
+    pairs: [(row_index, label), ...] → (binary n_rows×L matrix, vocabulary)
+    """
+    vocab = sorted({label for _, label in pairs})
+    col = {label: j for j, label in enumerate(vocab)}
+    rows = [r for r, _ in pairs]
+    cols = [col[label] for _, label in pairs]
+    M = _incidence(rows, cols, (n_rows, len(vocab)))
+    M.data[:] = 1
+    return M, vocab
+
+def build_sparse_kg(G):
+    nodes = list(G.nodes)
+    idx = {n: i for i, n in enumerate(nodes)}
+    types = [G.nodes[n].get("type") for n in nodes]
+    N = len(nodes)
+
+    hierarchy = {"event": ([], []), "event_segment": ([], []), "panel": ([], [])}
+    action_pairs, dialogue_links, char_pairs = [], [], []
+
+    for u, v, d in G.edges(data=True):
+        rel = d.get("relation")
+        tu, tv = types[idx[u]], types[idx[v]]
+        if rel == "subevent_of" and tu in ("event", "event_segment"):
+            hierarchy[tu][0].append(idx[v])
+            hierarchy[tu][1].append(idx[u])
+        elif rel == "instantiates" and tu == "panel":
+            hierarchy["panel"][0].append(idx[v])
+            hierarchy["panel"][1].append(idx[u])
+        elif rel == "has_action" and tv == "action" and u.startswith("Panel_visual_"):
+            panel = u[len("Panel_visual_"):]
+            label = G.nodes[v].get("label")
+            if panel in idx and label:
+                action_pairs.append((idx[panel], label))
+        elif rel == "has_character" and tu == "panel_visual" and tv == "character" \
+                and u.startswith("Panel_visual_"):
+            panel = u[len("Panel_visual_"):]
+            if panel in idx:
+                char_pairs.append((idx[panel], G.nodes[v].get("label", v).strip()))
+        elif rel == "part_of" and tu == "dialogue" and v.startswith("Panel_textual_"):
+            panel = v[len("Panel_textual_"):]
+            if panel in idx:
+                dialogue_links.append((idx[panel], u))
+
+    # text →(any edge)→ dialogue carries the dialogue line
+    dialogue_pairs = []
+    for panel_i, dlg in dialogue_links:
+        for pred in G.predecessors(dlg):
+            if G.nodes[pred].get("type") == "text":
+                label = G.nodes[pred].get("label")
+                if label:
+                    dialogue_pairs.append((panel_i, label))
+
+    matrices = {
+        "macro_event": _incidence(*hierarchy["event"], (N, N)),     # macro × event
+        "event": _incidence(*hierarchy["event_segment"], (N, N)),   # event × segment
+        "event_segment": _incidence(*hierarchy["panel"], (N, N)),   # segment × panel
+    }
+    label_vocab = {}
+    for name, pairs in (("action", action_pairs), ("dialogue", dialogue_pairs),
+                        ("character", char_pairs)):
+        matrices[name], label_vocab[name] = _label_matrix(pairs, N)
+
+    reading_rank = G.graph.get("temporal_index", {}).get("rank", {}).get("reading", {})
+    return SparseKG(nodes, types, matrices, label_vocab, reading_rank)
+
+
+# === Rollups ===
+def _rows_to_labels(SK, M, row_type, vocab):
+    M = M.tocsr()
+    out = {}
+    for n in SK.nodes_of_type(row_type):
+        i = SK.node_index[n]
+        cols = M.indices[M.indptr[i]:M.indptr[i + 1]]
+        out[n] = sorted(vocab[j] for j in cols)
+    return out
+
+def panels_per_macro_event_matrix(SK):
+    m = SK.matrices
+    return m["macro_event"] @ m["event"] @ m["event_segment"]
+
+def panels_per_event_matrix(SK):
+    m = SK.matrices
+    return m["event"] @ m["event_segment"]
+
+# === TASK 1: Action Retrieval for every macro-event
+def sparse_actions_by_macro_event(SK):
+    M = panels_per_macro_event_matrix(SK) @ SK.matrices["action"]
+    M.eliminate_zeros()
+    return _rows_to_labels(SK, M, "macro_event", SK.label_vocab["action"])
+
+# === TASK 2: Dialogue Trace for every event
+def sparse_dialogues_by_event(SK):
+    M = panels_per_event_matrix(SK) @ SK.matrices["dialogue"]
+    M.eliminate_zeros()
+    return _rows_to_labels(SK, M, "event", SK.label_vocab["dialogue"])
+
+# === TASK 3: Characters for every event
+def sparse_characters_by_event(SK):
+    M = panels_per_event_matrix(SK) @ SK.matrices["character"]
+    M.eliminate_zeros()
+    return _rows_to_labels(SK, M, "event", SK.label_vocab["character"])
+
+# === TASK 4: Panel Timeline for every macro-event
+def sparse_panels_by_macro_event(SK):
+    """
+    Entries of the product count hierarchy paths, so a panel reached through
+    several segments is repeated exactly as get_panels_by_macro_event does.
+    """
+    M = panels_per_macro_event_matrix(SK).tocsr()
+    out = {}
+    for n in SK.nodes_of_type("macro_event"):
+        i = SK.node_index[n]
+        lo, hi = M.indptr[i], M.indptr[i + 1]
+        panels = []
+        for j, count in zip(M.indices[lo:hi], M.data[lo:hi]):
+            panels.extend([SK.nodes[j]] * int(count))
+        out[n] = sort_by_rank(panels, SK.reading_rank)
+    return out
+
+
+# === MAIN TESTING ===
+if __name__ == "__main__":
+    SK = build_sparse_kg(load_kg())
+
+    print("\n=== ACTIONS for macro-event 'Think of family' ===")
+    print(sparse_actions_by_macro_event(SK).get("Think of family", []))
+
+    print("\n=== DIALOGUES for event 'Intro_1' ===")
+    print(sparse_dialogues_by_event(SK).get("Intro_1", []))
+
+    print("\n=== CHARACTERS per event ===")
+    for event, chars in sparse_characters_by_event(SK).items():
+        print(f"{event}: {chars}")
+
+    print("\n=== PANELS for macro-event 'Think of family' ===")
+    print(sparse_panels_by_macro_event(SK).get("Think of family", []))
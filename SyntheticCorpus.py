@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# === CONFIG ===
+OUTPUT_DIR = "Data/Annotation_Book_{book}"
+EXCEL_FILE = "Story_{book}_with_IDs.xlsx"
+EXCEL_MAX_ROWS = 1_048_575  # sheet limit minus the header row
+
+# (min, max) ranges are inclusive
+DEFAULTS = {
+    "panels_per_page": (4, 8),
+    "segment_panels": (1, 6),       # panels per event segment
+    "event_segments": (1, 5),       # segments per event
+    "macro_events": (2, 8),         # events per macro-event
+    "characters": 40,               # size of the book's cast
+    "event_cast": (2, 6),           # characters available to one event
+    "panel_characters": (1, 3),
+    "actions": (0, 3),              # actions per panel
+    "dialogues": (0, 4),            # dialogue lines per panel
+    "dialogue_words": (2, 14),
+    "scene_objects": (0, 3),
+    "caption_rate": 0.3,
+    "flashback_rate": 0.05,         # events told out of story-time order
+    "repeat_line_rate": 0.1,        # catchphrases reused across panels
+}
+
+NAMES = ["Mina", "Taro", "Grandma", "Kenji", "Yui", "Sora", "Hana", "Ren", "Aki", "Mom", "Dad",
+         "Teacher", "Cat", "Dog", "Neighbor", "Shopkeeper", "Rin", "Kai", "Emi", "Jun"]
+VERBS = ["look_at", "talk_to", "hold", "eat", "walk_to", "give", "hug", "point_at", "open",
+         "cook", "carry", "wave_to", "follow", "read", "push", "call"]
+OBJECTS = ["rice_cooker", "phone", "door", "table", "bag", "letter", "bowl", "window", "book",
+           "umbrella", "box", "chair", "bicycle", "cake", "clock"]
+SCENES = ["kitchen", "street", "classroom", "living_room", "park", "shop", "station", "garden"]
+EVENTS = ["Intro", "Get new rice_cooker", "Think of family", "Message from family", "Cook dinner",
+          "Walk home", "Meet friend", "Argument", "Make up", "Shopping", "Phone call", "Rainy day",
+          "Festival", "Lost item", "Search", "Reunion"]
+WORDS = ("i you we it this that the a is are was not so very what why where now here there "
+         "home rice dinner mom dad friend today tomorrow really okay wait look come go eat "
+         "good bad new old sorry thanks please yes no maybe again together soon late").split()
+
+
+# === Hierarchy (vectorized, one draw per level) ===
+def _run_lengths(rng, total, low_high):
+    """
+    Group sizes in [low, high] that sum exactly to total.
+    """
+    low, high = low_high
+    sizes = rng.integers(low, high + 1, size=total // max(low, 1) + 1)
+    ends = np.cumsum(sizes)
+    k = int(np.searchsorted(ends, total)) + 1
+    sizes = sizes[:k].copy()
+    sizes[-1] -= int(ends[k - 1]) - total
+    return sizes[sizes > 0]
+
+def _group_ids(rng, n_items, low_high):
+    """
+    item -> group index for consecutive runs of sizes in [low, high]
+    """
+    sizes = _run_lengths(rng, n_items, low_high)
+    return np.repeat(np.arange(len(sizes)), sizes)
+
+def make_hierarchy(n_panels, seed=0, book="0", **options):
+    """
+    Story_X_with_IDs rows for n_panels: reading order, pages, segment / event /
+    macro-event runs, Plot_1_ID / Plot_2_ID as AssignEventIDs would assign them,
+    and Narrative_Time on the first panel of each event.
+    """
+    cfg = {**DEFAULTS, **options}
+    rng = np.random.default_rng(seed)
+
+    page = _group_ids(rng, n_panels, cfg["panels_per_page"])
+    starts = np.flatnonzero(np.r_[True, page[1:] != page[:-1]])
+    pos_in_page = np.arange(n_panels) - np.repeat(starts, np.diff(np.r_[starts, n_panels]))
+
+    segment = _group_ids(rng, n_panels, cfg["segment_panels"])
+    event_of_segment = _group_ids(rng, segment[-1] + 1, cfg["event_segments"])
+    macro_of_event = _group_ids(rng, event_of_segment[-1] + 1, cfg["macro_events"])
+    event = event_of_segment[segment]
+    n_events = int(event[-1]) + 1
+
+    # Labels repeat across the book but never back to back (AssignEventIDs would merge
+    # the two runs); IDs count the repeats ("Intro_1", "Intro_2", ...)
+    steps = rng.integers(1, len(EVENTS), size=n_events)
+    event_label = np.asarray(EVENTS)[np.cumsum(steps) % len(EVENTS)]
+    occurrence = pd.Series(event_label).groupby(event_label).cumcount().to_numpy() + 1
+    event_id = np.char.add(np.char.add(event_label, "_"), occurrence.astype(str))
+    macro_label = np.char.add("Part ", (macro_of_event + 1).astype(str))
+
+    # Story time follows reading order except for flashbacks moved earlier
+    story_time = np.arange(n_events, dtype=float)
+    flashback = rng.random(n_events) < cfg["flashback_rate"]
+    story_time[flashback] -= rng.integers(1, 10, size=int(flashback.sum())) + 0.5
+    first_of_event = np.r_[True, event[1:] != event[:-1]]
+    segment_in_event = segment - segment[first_of_event][event] + 1
+
+    df = pd.DataFrame({
+        "Index": np.char.add(f"{book}_", np.char.add(np.char.add(page.astype(str), "_"), pos_in_page.astype(str))),
+        "Plot_0": macro_label[event],
+        "Plot_1": event_label[event],
+        "Plot_2": np.char.add(np.char.add(event_id[event], " / part "), segment_in_event.astype(str)),
+        "Plot_1_ID": event_id[event],
+        "Plot_2_ID": np.char.add("seg", np.char.zfill((segment + 1).astype(str), 3)),
+        "Shot": np.asarray(["wide", "medium", "close", "extreme_close"])[rng.integers(0, 4, size=n_panels)],
+        "Narrative_Time": np.where(first_of_event, story_time[event], np.nan),
+    })
+    df["Page"] = page
+    df["Event"] = event
+    return df
+
+def make_casts(n_events, seed=0, **options):
+    """
+    Per-event cast drawn from a Zipf-like popularity over the book's characters.
+    """
+    cfg = {**DEFAULTS, **options}
+    rng = np.random.default_rng(seed + 1)
+    n_chars = cfg["characters"]
+    cast = [NAMES[i] if i < len(NAMES) else f"Extra{i}" for i in range(n_chars)]
+    weights = 1.0 / np.arange(1, n_chars + 1)
+    weights /= weights.sum()
+    low, high = cfg["event_cast"]
+    sizes = rng.integers(low, min(high, n_chars) + 1, size=n_events)
+    return [[cast[i] for i in rng.choice(n_chars, size=k, replace=False, p=weights)] for k in sizes]
+
+
+# === Panel content (per page, seeded by page so any worker count gives the same book) ===
+def _between(rng, low_high):
+    return rng.randint(*low_high)
+
+def _line(rng, cfg, catchphrases):
+    if catchphrases and rng.random() < cfg["repeat_line_rate"]:
+        return rng.choice(catchphrases)
+    words = [rng.choice(WORDS) for _ in range(_between(rng, cfg["dialogue_words"]))]
+    return " ".join(words).capitalize() + rng.choice([".", "!", "?", "..."])
+
+def make_panel(rng, cast, cfg, catchphrases=()):
+    chars = rng.sample(cast, min(len(cast), _between(rng, cfg["panel_characters"])))
+    actions = []
+    for _ in range(_between(rng, cfg["actions"])):
+        subject = rng.choice(chars)
+        target = rng.choice([c for c in cast if c != subject] + OBJECTS)
+        actions.append(f"{subject} {rng.choice(VERBS)} {target}")
+    panel = {
+        "visual": {"encoders": [f"clip_{rng.randint(0, 9)}"]},
+        "scene": rng.sample(OBJECTS, _between(rng, cfg["scene_objects"])),
+        "characters": chars,
+        "actions": actions,
+        "textual": {"dialogues": [_line(rng, cfg, catchphrases) for _ in range(_between(rng, cfg["dialogues"]))]},
+    }
+    if rng.random() < cfg["caption_rate"]:
+        panel["caption"] = f"Meanwhile, at the {rng.choice(SCENES).replace('_', ' ')}."
+    return panel
+
+def make_page(page, events, casts, seed, cfg):
+    rng = random.Random(seed * 1_000_003 + page)
+    catchphrases = [_line(rng, {**cfg, "repeat_line_rate": 0}, ()) for _ in range(3)]
+    return {"panels": [make_panel(rng, casts[e], cfg, catchphrases) for e in events]}
+
+def make_book(n_panels, seed=0, book="0", **options):
+    """
+    Everything in memory: (Story_X_with_IDs DataFrame, {"{book}_{page}": page dict}).
+    """
+    cfg = {**DEFAULTS, **options}
+    df = make_hierarchy(n_panels, seed, book, **cfg)
+    casts = make_casts(int(df["Event"].iloc[-1]) + 1, seed, **cfg)
+    pages = {f"{book}_{page}": make_page(page, events, casts, seed, cfg)
+             for page, events in df.groupby("Page", sort=True)["Event"]}
+    return df.drop(columns=["Page", "Event"]), pages
+
+
+# === Writing ===
+def _write_pages(job):
+    out_dir, book, seed, cfg, casts, page_events = job
+    for page, events in page_events:
+        with open(os.path.join(out_dir, f"{book}_{page}.json"), "w", encoding="utf-8") as f:
+            json.dump(make_page(page, events, casts, seed, cfg), f, ensure_ascii=False)
+    return len(page_events)
+
+def write_book(book, n_panels, seed=0, out_dir=None, workers=1, excel=True, **options):
+    """
+    Write {book}_{page}.json files and Story_{book}_with_IDs.xlsx. Returns the sheet rows.
+    """
+    cfg = {**DEFAULTS, **options}
+    out_dir = out_dir or OUTPUT_DIR.format(book=book)
+    os.makedirs(out_dir, exist_ok=True)
+
+    df = make_hierarchy(n_panels, seed, book, **cfg)
+    casts = make_casts(int(df["Event"].iloc[-1]) + 1, seed, **cfg)
+    page_events = [(int(page), events.tolist()) for page, events in df.groupby("Page", sort=True)["Event"]]
+
+    # Casts are passed per chunk (only the events a chunk needs) to keep pickles small
+    n_chunks = max(1, workers * 8)
+    chunks = [page_events[i::n_chunks] for i in range(n_chunks) if page_events[i::n_chunks]]
+    jobs = [(out_dir, book, seed, cfg, {e: casts[e] for _, ev in chunk for e in ev}, chunk) for chunk in chunks]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_write_pages, jobs))
+    else:
+        for job in jobs:
+            _write_pages(job)
+
+    df = df.drop(columns=["Page", "Event"])
+    if excel:
+        if len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"{len(df)} panels do not fit in one sheet (max {EXCEL_MAX_ROWS})")
+        df.to_excel(os.path.join(out_dir, EXCEL_FILE.format(book=book)), index=False)
+    return df
+
+# === MAIN ===
+def _range(text):
+    low, _, high = text.partition(":")
+    return int(low), int(high or low)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic comic book for scale testing.")
+    parser.add_argument("--book", default="100", help="book number (numeric; used in file and panel IDs)")
+    parser.add_argument("--panels", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default=None, help=f"default: {OUTPUT_DIR}")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--no-excel", action="store_true", help="only write the page JSON files")
+    for key, value in DEFAULTS.items():
+        flag = "--" + key.replace("_", "-")
+        if isinstance(value, tuple):
+            parser.add_argument(flag, type=_range, default=value, metavar="MIN:MAX")
+        else:
+            parser.add_argument(flag, type=type(value), default=value)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    options = {key: getattr(args, key) for key in DEFAULTS}
+    df = write_book(args.book, args.panels, args.seed, args.out_dir, args.workers, not args.no_excel, **options)
+    out_dir = args.out_dir or OUTPUT_DIR.format(book=args.book)
+    print(f"✅ Book {args.book}: {len(df)} panels, {df['Index'].str.rsplit('_', n=1).str[0].nunique()} pages, "
+          f"{df['Plot_2_ID'].nunique()} segments, {df['Plot_1_ID'].nunique()} events, "
+          f"{df['Plot_0'].nunique()} macro-events → {out_dir} ({time.perf_counter() - start:.2f}s)")
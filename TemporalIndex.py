@@ -0,0 +1,159 @@
+import networkx as nx
+
+from ReasoningQueries_updated_2 import get_successors_by_relation, natural_key, sort_by_rank
+
+# === CONFIG ===
+RANKED_TYPES = ["panel", "event_segment", "event"]
+AXES = {"reading": "precedes_reading", "storytime": "precedes_storytime"}
+GRAPH_KEY = "temporal_index"
+
+# === Reading / story-time rank index ===
+class TemporalIndex:
+    """
+    Dense per-type ranks for panels, segments and events on both time axes.
+
+    Stored as plain JSON in G.graph["temporal_index"]:
+      rank:  axis -> node_id -> rank (0..n-1 within the node's type)
+      order: axis -> type -> [node_id, ...] (nodes by rank)
+    A rank lookup is a dict hit and a range query is a slice of the order
+    list, so "between / before / after" never walks an edge chain.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    def rank(self, node, axis="reading"):
+        return self.data["rank"][axis].get(node)
+
+    def _typed_order(self, node, axis):
+        """
+        (node type, that type's order list) of a ranked node.
+        """
+        r = self.rank(node, axis)
+        for node_type, order in self.data["order"][axis].items():
+            if r is not None and r < len(order) and order[r] == node:
+                return node_type, order
+        raise KeyError(f"{node!r} has no {axis} rank")
+
+    def _order_for(self, node, axis):
+        return self._typed_order(node, axis)[1]
+
+    def precedes(self, a, b, axis="reading"):
+        ra, rb = self.rank(a, axis), self.rank(b, axis)
+        return ra is not None and rb is not None and ra < rb
+
+    def between(self, x, y, axis="reading"):
+        """
+        Nodes of the same type as x and y whose rank lies in [rank(x), rank(y)].
+        Ranks are per type, so x and y of different types raise ValueError.
+        """
+        x_type, order = self._typed_order(x, axis)
+        y_type, _ = self._typed_order(y, axis)
+        if x_type != y_type:
+            raise ValueError(f"between() needs two nodes of one type: {x!r} is {x_type}, {y!r} is {y_type}")
+        lo, hi = sorted((self.rank(x, axis), self.rank(y, axis)))
+        return order[lo:hi + 1]
+
+    def before(self, node, axis="reading"):
+        return self._order_for(node, axis)[:self.rank(node, axis)]
+
+    def after(self, node, axis="reading"):
+        return self._order_for(node, axis)[self.rank(node, axis) + 1:]
+
+    def order(self, node_type, axis="reading"):
+        return list(self.data["order"][axis].get(node_type, []))
+
+    def sort(self, nodes, axis="reading"):
+        """
+        Sort nodes by rank; unranked nodes go last in natural ID order.
+        """
+        return sort_by_rank(nodes, self.data["rank"][axis])
+
+
+# === Builders ===
+def _chain_order(G, nodes, relation, tiebreak):
+    """
+    Topological order of `nodes` along `relation` edges. Cycles (e.g. a manual
+    story-time override that contradicts the annotated order) are collapsed
+    and ordered internally by `tiebreak`.
+    """
+    H = nx.DiGraph()
+    H.add_nodes_from(nodes)
+    for u, v, d in G.edges(data=True):
+        if d.get("relation") == relation and u in H and v in H and u != v:
+            H.add_edge(u, v)
+
+    C = nx.condensation(H)
+    comp_key = {c: min(tiebreak(n) for n in C.nodes[c]["members"]) for c in C.nodes}
+    order = []
+    for c in nx.lexicographical_topological_sort(C, key=lambda c: comp_key[c]):
+        order.extend(sorted(C.nodes[c]["members"], key=tiebreak))
+    return order
+
+def _parent_event(G, node, node_type):
+    if node_type == "event_segment":
+        events = get_successors_by_relation(G, node, "subevent_of", "event")
+    else:
+        events = []
+        for seg in get_successors_by_relation(G, node, "instantiates", "event_segment"):
+            events.extend(get_successors_by_relation(G, seg, "subevent_of", "event"))
+    return events[0] if events else None
+
+def build_temporal_index(G):
+    by_type = {t: [] for t in RANKED_TYPES}
+    for n, d in G.nodes(data=True):
+        if d.get("type") in by_type:
+            by_type[d["type"]].append(n)
+
+    rank = {axis: {} for axis in AXES}
+    order = {axis: {} for axis in AXES}
+
+    # Reading order: follow precedes_reading. Segments and events break ties
+    # by their first panel, since the KG is a DiGraph and a story-time edge
+    # between the same two events replaces their reading edge.
+    panels = _chain_order(G, by_type["panel"], AXES["reading"], natural_key)
+    order["reading"]["panel"] = panels
+    rank["reading"].update({n: i for i, n in enumerate(panels)})
+
+    first_panel = {}
+    for p in panels:
+        for seg in get_successors_by_relation(G, p, "instantiates", "event_segment"):
+            first_panel.setdefault(seg, rank["reading"][p])
+            for ev in get_successors_by_relation(G, seg, "subevent_of", "event"):
+                first_panel.setdefault(ev, rank["reading"][p])
+    unplaced = len(panels)
+    for node_type in ("event_segment", "event"):
+        seq = _chain_order(G, by_type[node_type], AXES["reading"],
+                           lambda n: (first_panel.get(n, unplaced), natural_key(n)))
+        order["reading"][node_type] = seq
+        rank["reading"].update({n: i for i, n in enumerate(seq)})
+
+    # Story time: events follow precedes_storytime (reading order for ties);
+    # segments and panels inherit their event's story rank.
+    reading = rank["reading"]
+    events = _chain_order(G, by_type["event"], AXES["storytime"], lambda n: reading[n])
+    order["storytime"]["event"] = events
+    rank["storytime"].update({n: i for i, n in enumerate(events)})
+
+    event_story = rank["storytime"]
+    unplaced = len(events)
+    for node_type in ("event_segment", "panel"):
+        def story_key(n, node_type=node_type):
+            ev = _parent_event(G, n, node_type)
+            return (event_story.get(ev, unplaced), reading[n])
+        seq = sorted(by_type[node_type], key=story_key)
+        order["storytime"][node_type] = seq
+        rank["storytime"].update({n: i for i, n in enumerate(seq)})
+
+    return TemporalIndex({"rank": rank, "order": order})
+
+def attach_temporal_index(G, index=None):
+    if index is None:
+        index = build_temporal_index(G)
+    G.graph[GRAPH_KEY] = index.data
+    return index
+
+def get_temporal_index(G):
+    if GRAPH_KEY in G.graph:
+        return TemporalIndex(G.graph[GRAPH_KEY])
+    return attach_temporal_index(G)
@@ -0,0 +1,166 @@
+import re
+import sys
+import json
+import argparse
+from bisect import bisect_left
+from pathlib import Path
+
+from ReasoningQueries_updated_2 import load_kg, get_successors_by_relation
+from CharacterIndex import panel_ancestors
+
+# === CONFIG ===
+KG_PATH = "Data/KGs_Book_0/integrated_kg.json"
+LEVELS = ["text", "panel", "event_segment", "event", "macro_event"]
+TOKEN_RE = re.compile(r"[\w']+")
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+def text_index_path(kg_path):
+    """
+    integrated_kg.json -> integrated_kg_text_index.json (same folder)
+    """
+    p = Path(kg_path)
+    return str(p.with_name(f"{p.stem}_text_index.json"))
+
+
+# === Inverted full-text index over `text` nodes ===
+class TextIndex:
+    """
+    Positional inverted index over dialogue and caption text nodes.
+      docs:     text_node -> {"kind", "text", "panel", "event_segment", "event", "macro_event"}
+      postings: token -> {text_node: [positions]}
+    Positions make phrase queries exact; a sorted vocabulary serves prefix
+    queries by bisection.
+    """
+
+    def __init__(self, data=None):
+        self.data = data if data is not None else {"docs": {}, "postings": {}}
+        self._vocab = None
+
+    def add(self, text_node, text, meta):
+        self.data["docs"][text_node] = dict(meta, text=text)
+        for pos, tok in enumerate(tokenize(text)):
+            self.data["postings"].setdefault(tok, {}).setdefault(text_node, []).append(pos)
+        self._vocab = None
+
+    @property
+    def vocab(self):
+        if self._vocab is None:
+            self._vocab = sorted(self.data["postings"])
+        return self._vocab
+
+    # === Queries ===
+    def _expand_prefix(self, prefix):
+        i = bisect_left(self.vocab, prefix)
+        out = []
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+            out.append(self.vocab[i])
+            i += 1
+        return out
+
+    def _positions(self, token, prefix=False):
+        """
+        text_node -> set of positions for a token (or every token with that prefix).
+        """
+        tokens = self._expand_prefix(token) if prefix else [token]
+        merged = {}
+        for tok in tokens:
+            for doc, positions in self.data["postings"].get(tok, {}).items():
+                merged.setdefault(doc, set()).update(positions)
+        return merged
+
+    def match_text_nodes(self, query, prefix=False):
+        """
+        Text nodes containing `query` as a phrase. With prefix=True the last
+        query token matches any token it is a prefix of ("rice coo" -> "rice cooker").
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        per_token = [self._positions(t, prefix and i == len(tokens) - 1)
+                     for i, t in enumerate(tokens)]
+        # Intersect smallest posting first
+        candidates = set(min(per_token, key=len))
+        for postings in per_token:
+            candidates &= postings.keys()
+
+        hits = []
+        for doc in candidates:
+            starts = per_token[0][doc]
+            if any(all(s + i in per_token[i][doc] for i in range(1, len(tokens))) for s in starts):
+                hits.append(doc)
+        return sorted(hits)
+
+    def search(self, query, level="event", prefix=False):
+        docs = self.match_text_nodes(query, prefix)
+        if level == "text":
+            return docs
+        out = set()
+        for doc in docs:
+            value = self.data["docs"][doc].get(level)
+            if isinstance(value, list):
+                out.update(value)
+            elif value:
+                out.add(value)
+        return sorted(out)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+
+
+# === Builders ===
+def _text_owner(G, text_node):
+    """
+    text →content_of→ Dialogue_*/Caption_* →part_of→ Panel_textual_<panel>
+    """
+    for holder in get_successors_by_relation(G, text_node, "content_of"):
+        kind = G.nodes[holder].get("type")
+        for pt in get_successors_by_relation(G, holder, "part_of", "panel_textual"):
+            if pt.startswith("Panel_textual_"):
+                return kind, pt[len("Panel_textual_"):]
+    return None, None
+
+def build_text_index(G):
+    index = TextIndex()
+    ancestors = {}
+    for n, d in G.nodes(data=True):
+        if d.get("type") != "text" or not d.get("label"):
+            continue
+        kind, panel = _text_owner(G, n)
+        meta = {"kind": kind, "panel": panel}
+        if panel is not None:
+            if panel not in ancestors:
+                ancestors[panel] = panel_ancestors(G, panel) if panel in G else {}
+            meta.update(ancestors[panel])
+        index.add(n, d["label"], meta)
+    return index
+
+def load_text_index(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return TextIndex(json.load(f))
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search dialogue/caption text in an integrated KG.")
+    parser.add_argument("query", nargs="?", help="phrase to search for")
+    parser.add_argument("--kg", default=KG_PATH)
+    parser.add_argument("--level", default="event", choices=LEVELS)
+    parser.add_argument("--prefix", action="store_true", help="treat the last word as a prefix")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index from the KG")
+    args = parser.parse_args()
+
+    index_path = text_index_path(args.kg)
+    if args.rebuild or not Path(index_path).exists():
+        index = build_text_index(load_kg(args.kg))
+        index.save(index_path)
+        print(f"✅ Text index saved to {index_path}")
+    else:
+        index = load_text_index(index_path)
+
+    if not args.query:
+        sys.exit(0)
+    for hit in index.search(args.query, args.level, args.prefix):
+        print(hit)